@@ -0,0 +1,57 @@
+import argparse
+import contextlib
+import io
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.absolute().parent
+sys.path.insert(0, str(ROOT / "src"))
+
+import acme.renderer as renderer  # noqa: E402
+from acme.context import Context  # noqa: E402
+from acme.parser import to_json  # noqa: E402
+from benchmarks.generator import generate_nested_text  # noqa: E402
+from benchmarks.run import _measure_time  # noqa: E402
+
+# Measures how the text view rendering scales with the nesting depth of
+# config elements, the total number of lines being the same:
+#
+#   python -m benchmarks.depth --lines 100000 --depth 2 4 8 16 32 64
+#
+# The time per line should stay flat as the depth grows.
+
+DEFAULT_DEPTHS: list[int] = [2, 4, 8, 16, 32, 64]
+
+
+def run(lines: int, depths: list[int], repeat: int) -> None:
+    print(f"{'depth':>6}{'lines':>10}{'time, s':>10}{'us/line':>10}")
+
+    for depth in depths:
+        src: str = generate_nested_text(lines, depth)
+        line_count: int = src.count("\n")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            json_cfg = to_json(src)
+        ctx: Context = Context(json_cfg)
+
+        elapsed: float = _measure_time(
+            lambda: renderer._to_text_config(json_cfg, ctx), repeat
+        )
+        print(
+            f"{depth:>6}{line_count:>10}{elapsed:>10.3f}"
+            f"{elapsed / line_count * 1_000_000:>10.2f}"
+        )
+
+
+###############################################################################
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark text view rendering by nesting depth"
+    )
+    arg_parser.add_argument("--lines", type=int, default=100_000)
+    arg_parser.add_argument("--depth", type=int, nargs="+", default=DEFAULT_DEPTHS)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    run(args.lines, args.depth, args.repeat)
@@ -0,0 +1,514 @@
+import argparse
+import sys
+from typing import Iterator
+
+# Generates synthetic ACLI configs ("show running-config" output) of the given size.
+# Elements carry the usual amount of default attributes, so the proportion of
+# repeated lines is close to the real captures.
+
+KEY_PAD_SIZE: int = 40
+INDENT: str = "        "
+
+PROMPT: list[str] = [
+    "",
+    "SBC1# show running-config",
+    "",
+]
+
+FOOTER: list[str] = [
+    "task done",
+    "SBC1# ",
+]
+
+REALM_DEFAULTS: list[str] = [
+    "addr-prefix 0.0.0.0",
+    "mm-in-realm disabled",
+    "mm-in-network enabled",
+    "mm-same-ip enabled",
+    "mm-in-system enabled",
+    "bw-cac-non-mm disabled",
+    "msm-release disabled",
+    "qos-enable disabled",
+    "max-bandwidth 0",
+    "fallback-bandwidth 0",
+    "max-priority-bandwidth 0",
+    "max-latency 0",
+    "max-jitter 0",
+    "max-packet-loss 0",
+    "observ-window-size 0",
+    "parent-realm",
+    "dns-realm",
+    "media-policy",
+    "media-sec-policy",
+    "srtp-msm-passthrough disabled",
+    "class-profile",
+    "in-translationid",
+    "out-translationid",
+    "average-rate-limit 0",
+    "access-control-trust-level none",
+    "invalid-signal-threshold 0",
+    "maximum-signal-threshold 0",
+    "untrusted-signal-threshold 0",
+    "nat-trust-threshold 0",
+    "max-endpoints-per-nat 0",
+    "nat-invalid-message-threshold 0",
+    "wait-time-for-invalid-register 0",
+    "deny-period 30",
+    "cac-failure-threshold 0",
+    "untrust-cac-failure-threshold 0",
+    "ext-policy-svr",
+    "subscription-id-type END_USER_NONE",
+    "symmetric-latching disabled",
+    "pai-strip disabled",
+    "trunk-context",
+    "device-id",
+    "early-media-allow",
+    "enforcement-profile",
+    "additional-prefixes",
+    "restricted-latching none",
+    "restriction-mask 32",
+    "user-cac-mode none",
+    "user-cac-bandwidth 0",
+    "user-cac-sessions 0",
+    "icmp-detect-multiplier 0",
+    "icmp-advertisement-interval 0",
+    "icmp-target-ip",
+    "monthly-minutes 0",
+    "options",
+    "spl-options",
+    "accounting-enable enabled",
+    "net-management-control disabled",
+    "delay-media-update disabled",
+    "refer-call-transfer disabled",
+    "dyn-refer-term disabled",
+    "codec-manip-in-realm disabled",
+    "codec-manip-in-network enabled",
+    "rtcp-policy",
+    "call-recording-server-id",
+    "session-recording-server",
+    "session-recording-required disabled",
+    "manipulation-string",
+    "manipulation-pattern",
+    "stun-enable disabled",
+    "stun-server-ip 0.0.0.0",
+    "stun-server-port 3478",
+    "stun-changed-ip 0.0.0.0",
+    "stun-changed-port 3479",
+    "sip-profile",
+    "sip-isup-profile",
+    "match-media-profiles",
+    "qos-constraint",
+    "block-rtcp disabled",
+    "hide-egress-media-update disabled",
+]
+
+SIP_INTERFACE_DEFAULTS: list[str] = [
+    "state enabled",
+    "description",
+    "carriers",
+    "trans-expire 0",
+    "initial-inv-trans-expire 0",
+    "invite-expire 0",
+    "max-redirect-contacts 0",
+    "proxy-mode",
+    "redirect-action",
+    "contact-mode none",
+    "nat-traversal none",
+    "nat-interval 30",
+    "tcp-nat-interval 90",
+    "registration-caching disabled",
+    "min-reg-expire 300",
+    "registration-interval 3600",
+    "route-to-registrar disabled",
+    "secured-network disabled",
+    "teluri-scheme disabled",
+    "uri-fqdn-domain",
+    "options",
+    "spl-options",
+    "trust-mode all",
+    "max-nat-interval 3600",
+    "nat-int-increment 10",
+    "nat-test-increment 30",
+    "sip-dynamic-hnt disabled",
+    "stop-recurse 401,407",
+    "port-map-start 0",
+    "port-map-end 0",
+    "in-manipulationid",
+    "sip-ims-feature disabled",
+    "sip-atcf-feature disabled",
+    "subscribe-reg-event disabled",
+    "operator-identifier",
+    "anonymous-priority none",
+    "max-incoming-conns 0",
+    "per-src-ip-max-incoming-conns 0",
+    "inactive-conn-timeout 0",
+    "untrusted-conn-timeout 0",
+    "network-id",
+    "ext-policy-server",
+    "ldap-policy-server",
+    "default-location-string",
+    "term-tgrp-mode none",
+    "charging-vector-mode pass",
+    "charging-function-address-mode pass",
+    "ccf-address",
+    "ecf-address",
+    "implicit-service-route disabled",
+    "rfc2833-payload 101",
+    "rfc2833-mode transparent",
+    "constraint-name",
+    "response-map",
+    "local-response-map",
+    "sec-agree-feature disabled",
+    "sec-agree-pref ipsec3gpp",
+    "enforcement-profile",
+    "route-unauthorized-calls",
+    "tcp-keepalive none",
+    "add-sdp-invite disabled",
+    "p-early-media-header disabled",
+    "p-early-media-direction",
+    "add-sdp-profiles",
+    "manipulation-string",
+    "manipulation-pattern",
+    "sip-profile",
+    "sip-isup-profile",
+    "tcp-conn-dereg 0",
+    "tunnel-name",
+    "register-keep-alive none",
+    "kpml-interworking disabled",
+    "msrp-delay-egress-bye disabled",
+    "send-380-response",
+    "pcscf-restoration",
+    "session-timer-profile",
+    "session-recording-server",
+    "session-recording-required disabled",
+    "service-tag",
+    "reg-cache-route disabled",
+]
+
+SESSION_AGENT_DEFAULTS: list[str] = [
+    "description",
+    "port 5060",
+    "state enabled",
+    "app-protocol SIP",
+    "app-type",
+    "transport-method UDP",
+    "egress-realm-id",
+    "carriers",
+    "allow-next-hop-lp enabled",
+    "constraints disabled",
+    "max-sessions 0",
+    "max-inbound-sessions 0",
+    "max-outbound-sessions 0",
+    "max-burst-rate 0",
+    "max-inbound-burst-rate 0",
+    "max-outbound-burst-rate 0",
+    "max-sustain-rate 0",
+    "max-inbound-sustain-rate 0",
+    "max-outbound-sustain-rate 0",
+    "min-seizures 5",
+    "min-asr 0",
+    "cac-trap-threshold 0",
+    "time-to-resume 0",
+    "ttr-no-response 0",
+    "in-service-period 0",
+    "burst-rate-window 0",
+    "sustain-rate-window 0",
+    "req-uri-carrier-mode None",
+    "proxy-mode",
+    "redirect-action",
+    "loose-routing enabled",
+    "send-media-session enabled",
+    "response-map",
+    "ping-method OPTIONS;hops=0",
+    "ping-interval 30",
+    "ping-send-mode keep-alive",
+    "ping-all-addresses disabled",
+    "ping-in-service-response-codes",
+    "out-service-response-codes",
+    "load-balance-dns-query hunt",
+    "options",
+    "spl-options",
+    "media-profiles",
+    "in-translationid",
+    "out-translationid",
+    "trust-me disabled",
+    "local-response-map",
+    "ping-to-user-part",
+    "ping-from-user-part",
+    "in-manipulationid",
+    "manipulation-string",
+    "manipulation-pattern",
+    "p-asserted-id",
+    "trunk-group",
+    "max-register-sustain-rate 0",
+    "early-media-allow",
+    "invalidate-registrations disabled",
+    "rfc2833-mode none",
+    "rfc2833-payload 0",
+    "codec-policy",
+    "enforcement-profile",
+    "refer-call-transfer disabled",
+    "refer-notify-provisional none",
+    "reuse-connections NONE",
+    "tcp-keepalive none",
+    "tcp-reconn-interval 0",
+    "max-register-burst-rate 0",
+    "register-burst-window 0",
+    "sip-profile",
+    "sip-isup-profile",
+    "kpml-interworking inherit",
+    "monitoring-filters",
+    "session-recording-server",
+    "session-recording-required disabled",
+    "hold-refer-reinvite disabled",
+    "send-tcp-fin disabled",
+]
+
+
+def _pair(key: str, value: str, depth: int = 1) -> str:
+    indent: str = INDENT * depth
+    return indent + key.ljust(KEY_PAD_SIZE) + value if value else indent + key
+
+
+def _defaults(items: list[str], depth: int = 1) -> Iterator[str]:
+    for item in items:
+        key, _, value = item.partition(" ")
+        yield _pair(key, value, depth)
+
+
+# old config format: string list values start from the new line
+def _string_list(key: str, values: list[str], depth: int = 1) -> Iterator[str]:
+    yield INDENT * depth + key
+    for value in values:
+        yield " " * (len(INDENT) * depth + KEY_PAD_SIZE) + value
+
+
+def _footer(idx: int) -> Iterator[str]:
+    yield _pair("last-modified-by", f"admin@10.0.0.{idx % 250}")
+    yield _pair(
+        "last-modified-date", f"2024-01-{idx % 28 + 1:02d} 10:{idx % 60:02d}:00"
+    )
+
+
+def realm_config(idx: int, manipulations: int) -> Iterator[str]:
+    yield "realm-config"
+    yield _pair("identifier", f"realm{idx}")
+    yield _pair("description", f"realm number {idx}")
+    yield from _string_list("network-interfaces", [f"M0{idx % 2}:{idx % 4}"])
+    manip: str = f"manip{idx % manipulations}" if manipulations else ""
+    yield _pair("in-manipulationid", manip)
+    yield _pair("out-manipulationid", "")
+    yield _pair("codec-policy", "codec0" if idx % 3 == 0 else "")
+    yield _pair("constraint-name", "")
+    yield from _defaults(REALM_DEFAULTS)
+    yield from _footer(idx)
+
+
+def sip_interface(idx: int, realms: int) -> Iterator[str]:
+    yield "sip-interface"
+    yield _pair("realm-id", f"realm{idx % max(realms, 1)}")
+    yield "        sip-port"
+    yield _pair("address", f"10.{idx // 250 % 250}.{idx % 250}.1", 2)
+    yield _pair("port", "5060", 2)
+    yield _pair("transport-protocol", "UDP", 2)
+    yield _pair("tls-profile", "", 2)
+    yield _pair("allow-anonymous", "all", 2)
+    yield _pair("multi-home-addrs", "", 2)
+    yield _pair("ims-aka-profile", "", 2)
+    yield from _defaults(SIP_INTERFACE_DEFAULTS)
+    yield from _footer(idx)
+
+
+def session_agent(idx: int, realms: int, manipulations: int) -> Iterator[str]:
+    yield "session-agent"
+    yield _pair("hostname", f"sa{idx}.example.com")
+    yield _pair("ip-address", f"172.{idx // 250 % 250}.{idx % 250}.10")
+    yield _pair("realm-id", f"realm{idx % max(realms, 1)}")
+    manip: str = f"manip{idx % manipulations}" if manipulations and idx % 2 else ""
+    yield _pair("out-manipulationid", manip)
+    yield from _defaults(SESSION_AGENT_DEFAULTS)
+    yield from _footer(idx)
+
+
+def local_policy(idx: int, realms: int, agents: int) -> Iterator[str]:
+    yield "local-policy"
+    yield from _string_list("from-address", [f"+7{idx:09d}", f"+8{idx:09d}"])
+    yield from _string_list("to-address", ["*"])
+    yield _pair("source-realm", f"realm{idx % max(realms, 1)}")
+    yield _pair("description", "")
+    yield _pair("activate-time", "")
+    yield _pair("deactivate-time", "")
+    yield _pair("state", "enabled")
+    yield _pair("policy-priority", "none")
+    for attr in range(2):
+        yield "        policy-attribute"
+        yield _pair("next-hop", f"sa{(idx + attr) % max(agents, 1)}.example.com", 2)
+        yield _pair("realm", f"realm{(idx + attr + 1) % max(realms, 1)}", 2)
+        yield _pair("action", "none", 2)
+        yield _pair("terminate-recursion", "disabled", 2)
+        yield _pair("cost", str(attr), 2)
+        yield _pair("state", "enabled", 2)
+        yield _pair("app-protocol", "SIP", 2)
+        yield _pair("methods", "", 2)
+        yield _pair("media-profiles", "", 2)
+        yield _pair("lookup", "single", 2)
+        yield _pair("next-key", "", 2)
+        yield _pair("eloc-str-lkup", "disabled", 2)
+        yield _pair("eloc-str-match", "", 2)
+    yield from _footer(idx)
+
+
+def sip_manipulation(idx: int) -> Iterator[str]:
+    yield "sip-manipulation"
+    yield _pair("name", f"manip{idx}")
+    yield _pair("description", "")
+    yield _pair("split-headers", "")
+    yield _pair("join-headers", "")
+    for rule in range(3):
+        yield "        header-rule"
+        yield _pair("name", f"hr{rule}", 2)
+        yield _pair("header-name", "From" if rule % 2 else "To", 2)
+        yield _pair("action", "manipulate", 2)
+        yield _pair("comparison-type", "case-sensitive", 2)
+        yield _pair("msg-type", "request", 2)
+        yield _pair("methods", "INVITE", 2)
+        yield _pair("match-value", "", 2)
+        yield _pair("new-value", "", 2)
+        for elem in range(2):
+            yield "                element-rule"
+            yield _pair("name", f"er{elem}", 3)
+            yield _pair("parameter-name", "", 3)
+            yield _pair("type", "uri-user", 3)
+            yield _pair("action", "replace", 3)
+            yield _pair("match-val-type", "any", 3)
+            yield _pair("comparison-type", "pattern-rule", 3)
+            yield _pair("match-value", r"^\+7(.*)$", 3)
+            yield _pair("new-value", r"$ORIGINAL.$1", 3)
+    yield from _footer(idx)
+
+
+# sip-manipulation with rules nested into each other down to the given depth
+def nested_manipulation(idx: int, depth: int, attributes: int = 4) -> Iterator[str]:
+    yield "sip-manipulation"
+    yield _pair("name", f"nested{idx}")
+    for level in range(1, depth):
+        yield INDENT * level + "header-rule"
+        for attr in range(attributes):
+            yield _pair(f"attr{attr}", f"value{level}.{attr}", level + 1)
+    yield from _footer(idx)
+
+
+def network_interface(idx: int) -> Iterator[str]:
+    yield "network-interface"
+    yield _pair("name", f"M0{idx % 2}")
+    yield _pair("sub-port-id", str(idx % 4))
+    yield _pair("description", "")
+    yield _pair("hostname", "")
+    yield _pair("ip-address", f"192.168.{idx}.1")
+    yield _pair("netmask", "255.255.255.0")
+    yield _pair("gateway", f"192.168.{idx}.254")
+    yield from _string_list("hip-ip-list", [f"192.168.{idx}.1"])
+    yield from _string_list("icmp-address", [f"192.168.{idx}.1"])
+    yield from _footer(idx)
+
+
+def codec_policy(idx: int) -> Iterator[str]:
+    yield "codec-policy"
+    yield _pair("name", f"codec{idx}")
+    yield _pair("allow-codecs", "PCMA PCMU telephone-event")
+    yield _pair("add-codecs-on-egress", "")
+    yield _pair("order-codecs", "")
+    yield _pair("packetization-time", "20")
+    yield _pair("force-ptime", "disabled")
+    yield from _footer(idx)
+
+
+def generate(
+    realms: int = 10,
+    sip_interfaces: int = 10,
+    session_agents: int = 20,
+    local_policies: int = 50,
+    sip_manipulations: int = 5,
+    garbage: bool = True,
+) -> Iterator[str]:
+    if garbage:
+        yield from PROMPT
+
+    for idx in range(4):
+        yield from network_interface(idx)
+    yield from codec_policy(0)
+
+    for idx in range(realms):
+        yield from realm_config(idx, sip_manipulations)
+    for idx in range(sip_interfaces):
+        yield from sip_interface(idx, realms)
+    for idx in range(session_agents):
+        yield from session_agent(idx, realms, sip_manipulations)
+    for idx in range(local_policies):
+        yield from local_policy(idx, realms, session_agents)
+    for idx in range(sip_manipulations):
+        yield from sip_manipulation(idx)
+
+    if garbage:
+        yield from FOOTER
+
+
+# approximate size of each element in lines, see the generators above
+_REALM_SIZE: int = 90
+_SIP_INTERFACE_SIZE: int = 92
+_SESSION_AGENT_SIZE: int = 83
+_LOCAL_POLICY_SIZE: int = 42
+_SIP_MANIPULATION_SIZE: int = 88
+
+
+# Generates a config of roughly the given number of lines. The element mix
+# follows a typical trunking SBC: many local policies and session agents,
+# fewer realms and interfaces.
+def generate_lines(lines: int, garbage: bool = True) -> Iterator[str]:
+    unit: int = (
+        _REALM_SIZE
+        + _SIP_INTERFACE_SIZE
+        + 4 * _SESSION_AGENT_SIZE
+        + 10 * _LOCAL_POLICY_SIZE
+        + _SIP_MANIPULATION_SIZE
+    )
+    # at least two of each, single elements are rendered differently
+    count: int = max(lines // unit, 2)
+
+    return generate(
+        realms=count,
+        sip_interfaces=count,
+        session_agents=4 * count,
+        local_policies=10 * count,
+        sip_manipulations=count,
+        garbage=garbage,
+    )
+
+
+def generate_text(lines: int, garbage: bool = True) -> str:
+    return "\n".join(generate_lines(lines, garbage)) + "\n"
+
+
+# generates roughly the given number of lines of nested sip-manipulations
+def generate_nested_text(lines: int, depth: int) -> str:
+    size: int = 4 + (depth - 1) * 5
+    return (
+        "\n".join(
+            line
+            for idx in range(max(lines // size, 2))
+            for line in nested_manipulation(idx, depth)
+        )
+        + "\n"
+    )
+
+
+###############################################################################
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Generate synthetic ACLI config")
+    arg_parser.add_argument("--lines", type=int, default=10_000)
+    arg_parser.add_argument("--no-garbage", action="store_true")
+    args = arg_parser.parse_args()
+
+    for line in generate_lines(args.lines, not args.no_garbage):
+        sys.stdout.write(line + "\n")
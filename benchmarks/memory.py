@@ -0,0 +1,65 @@
+import argparse
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).parent.absolute().parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from acme.parser import ParserOptions, parse  # noqa: E402
+from benchmarks.generator import generate_text  # noqa: E402
+from benchmarks.run import DEFAULT_SIZES, _measure_time  # noqa: E402
+
+# Compares the memory taken by the parsed tree with and without interning of
+# keys and values (see ParserOptions.intern):
+#
+#   python -m benchmarks.memory --lines 10000 100000 1000000
+#
+# "tree" is the memory still allocated once the config is parsed, i.e. the
+# cost of keeping the tree around, "peak" includes the parser's own state.
+
+
+def run(sizes: list[int], repeat: int) -> None:
+    for size in sizes:
+        lines: list[str] = generate_text(size).splitlines()
+
+        print(f"\n{len(lines)} lines")
+        print(f"{'tree':<10}{'time, s':>10}{'tree, MB':>10}{'peak, MB':>10}")
+
+        for intern in (False, True):
+            options = ParserOptions(intern=intern, max_samples=0)
+            elapsed: float = _measure_time(lambda: parse(lines, options), repeat)
+            retained, peak = _measure_tree(lines, options)
+
+            print(
+                f"{'interned' if intern else 'plain':<10}{elapsed:>10.3f}"
+                f"{retained / 1024 / 1024:>10.1f}{peak / 1024 / 1024:>10.1f}"
+            )
+
+
+def _measure_tree(lines: list[str], options: ParserOptions) -> tuple[int, int]:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        json_cfg: dict[str, Any] = parse(lines, options)[0]
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+        del json_cfg
+        return retained, peak
+    finally:
+        tracemalloc.stop()
+
+
+###############################################################################
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark memory of the parsed tree"
+    )
+    arg_parser.add_argument("--lines", type=int, nargs="+", default=DEFAULT_SIZES)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    run(args.lines, args.repeat)
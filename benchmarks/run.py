@@ -0,0 +1,112 @@
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT = Path(__file__).parent.absolute().parent
+sys.path.insert(0, str(ROOT / "src"))
+
+import acme.renderer as renderer  # noqa: E402
+from acme.context import Context  # noqa: E402
+from acme.parser import to_json  # noqa: E402
+from benchmarks.generator import generate_text  # noqa: E402
+
+# Measures every stage of the HTML conversion separately:
+#
+#   python -m benchmarks.run --lines 1000 10000 100000 1000000
+#
+# Each stage is timed (best of --repeat runs) and then run once more under
+# tracemalloc to report the peak amount of memory allocated by the stage.
+
+DEFAULT_SIZES: list[int] = [1_000, 10_000, 100_000]
+
+
+class Stage:
+    def __init__(self, name: str, func: Callable[[], Any]) -> None:
+        self.name: str = name
+        self.func: Callable[[], Any] = func
+
+
+def _stages(src: str) -> list[Stage]:
+    json_cfg: dict[str, Any] = to_json(src)
+    ctx: Context = Context(json_cfg)
+    meta = renderer._PageMeta(json_cfg, ctx)
+    tree_template = renderer.ENV.get_template("tree.html")
+
+    return [
+        Stage("to_json", lambda: to_json(src)),
+        Stage("Context", lambda: Context(json_cfg)),
+        Stage("_PageMeta", lambda: renderer._PageMeta(json_cfg, ctx)),
+        Stage("_to_text_config", lambda: renderer._to_text_config(json_cfg, ctx)),
+        Stage(
+            "tree.html",
+            lambda: tree_template.render(cfg=json_cfg, ctx=ctx, meta=meta),
+        ),
+        Stage("render", lambda: renderer.render(json_cfg, "benchmark")),
+        Stage("render_to", lambda: _render_to_null(json_cfg)),
+    ]
+
+
+def _render_to_null(json_cfg: dict[str, Any]) -> None:
+    with open(os.devnull, "w") as f:
+        renderer.render_to(f, json_cfg, "benchmark")
+
+
+def _measure_time(func: Callable[[], Any], repeat: int) -> float:
+    best: float = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start: float = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _measure_memory(func: Callable[[], Any]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(sizes: list[int], repeat: int, stages: list[str] | None) -> None:
+    # compiles templates and registers filters
+    renderer.render({})
+
+    for size in sizes:
+        src: str = generate_text(size)
+        line_count: int = src.count("\n")
+
+        print(f"\n{line_count} lines, {len(src) / 1024 / 1024:.1f} MB")
+        print(f"{'stage':<18}{'time, s':>10}{'lines/s':>12}{'peak, MB':>10}")
+
+        for stage in _stages(src):
+            if stages and stage.name not in stages:
+                continue
+
+            elapsed: float = _measure_time(stage.func, repeat)
+            peak: int = _measure_memory(stage.func)
+
+            print(
+                f"{stage.name:<18}{elapsed:>10.3f}{line_count / elapsed:>12.0f}"
+                f"{peak / 1024 / 1024:>10.1f}"
+            )
+
+
+###############################################################################
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark config conversion")
+    arg_parser.add_argument("--lines", type=int, nargs="+", default=DEFAULT_SIZES)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--stage", action="append", dest="stages")
+    args = arg_parser.parse_args()
+
+    run(args.lines, args.repeat, args.stages)
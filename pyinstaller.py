@@ -1,22 +1,25 @@
 import os
+import sys
 from pathlib import Path
 
 import PyInstaller.__main__
 
 ROOT = Path(__file__).parent.absolute()
+TEMPLATES_DIR = ROOT / "build/templates"
+
+# the GUI stack isn't needed by the headless CLI build
+GUI_MODULES = ["tkinter", "_tkinter", "customtkinter", "darkdetect", "PIL"]
 
 
 def install():
+    _compile_templates()
+
     PyInstaller.__main__.run(
         [
             str(ROOT / "src/main.py"),
             "--name",
-            (
-                "sbc-html-config_x86-64.exe"
-                if os.name == "nt"
-                else "sbc-html-config_x86-64"
-            ),
-            "--add-data=src/acme/assets:acme/assets",
+            _get_binary_name("sbc-html-config"),
+            *_get_data_args(),
             "--icon=NONE",
             "--onefile",
             "--windowed",
@@ -24,3 +27,40 @@ def install():
             "customtkinter",
         ]
     )
+
+
+def install_cli():
+    _compile_templates()
+
+    PyInstaller.__main__.run(
+        [
+            str(ROOT / "src/cli.py"),
+            "--name",
+            _get_binary_name("sbc-html-config-cli"),
+            *_get_data_args(),
+            *[f"--exclude-module={module}" for module in GUI_MODULES],
+            "--icon=NONE",
+            "--onefile",
+            "--console",
+        ]
+    )
+
+
+def _get_binary_name(name: str) -> str:
+    return f"{name}_x86-64.exe" if os.name == "nt" else f"{name}_x86-64"
+
+
+def _get_data_args() -> list[str]:
+    return [
+        "--add-data=src/acme/assets:acme/assets",
+        f"--add-data={TEMPLATES_DIR}:acme/templates",
+    ]
+
+
+# templates are bundled precompiled, so that the app doesn't compile them
+# on every launch
+def _compile_templates():
+    sys.path.insert(0, str(ROOT / "src"))
+    import acme.renderer as renderer
+
+    renderer.compile_templates(TEMPLATES_DIR)
@@ -20,90 +20,236 @@ document.addEventListener(
       expandDiv.textContent = expanded ? "[collapse]" : "[expand]";
     });
 
-    // realm specifics filter
-    realmSelect.addEventListener("change", function handleSelectChange(event) {
-      const selectedRealm = event.target.value;
-
-      document.querySelectorAll(".config code").forEach((span) => {
-        if (selectedRealm === wildcard) {
-          span.classList.remove("hidden");
-        } else {
-          const realms = span.getAttribute("data-realms").split(" ");
-          if (realms.includes(selectedRealm)) {
-            span.classList.remove("hidden");
-          } else {
-            span.classList.add("hidden");
+    // lazy config view: parts of the config are kept in inert <template>
+    // placeholders and inserted into the page when scrolled or navigated to
+    const lazyObserver = new IntersectionObserver(
+      (entries) => {
+        entries.forEach((entry) => {
+          if (entry.isIntersecting) {
+            materialize(entry.target);
           }
+        });
+      },
+      { rootMargin: "100% 0px" }
+    );
+
+    function materialize(placeholder) {
+      lazyObserver.unobserve(placeholder);
+      placeholder.replaceWith(
+        placeholder.querySelector(":scope > template").content
+      );
+    }
+
+    // finds the placeholder containing the anchor, e.g. "local-policy_123"
+    function findPlaceholder(id) {
+      const match = /^(.*)_(\d+)$/.exec(id);
+
+      for (const placeholder of document.querySelectorAll(".lazy")) {
+        const section = placeholder.getAttribute("data-section");
+        if (section === id) {
+          return placeholder;
         }
-      });
 
-      document.querySelectorAll("span.level2").forEach((span) => {
-        if (selectedRealm === wildcard) {
-          span.parentElement.classList.remove("hidden");
-          span.parentElement.classList.remove("display-block");
-        } else {
-          const realms = span.getAttribute("data-realms").split(" ");
-          if (realms.includes(selectedRealm)) {
-            span.parentElement.classList.remove("hidden");
-            span.parentElement.classList.add("display-block");
-          } else {
-            span.parentElement.classList.add("hidden");
-            span.parentElement.classList.remove("display-block");
+        if (match && section === match[1]) {
+          const idx = Number(match[2]);
+          const from = Number(placeholder.getAttribute("data-from"));
+          const to = Number(placeholder.getAttribute("data-to"));
+          if (idx >= from && idx <= to) {
+            return placeholder;
           }
         }
-      });
+      }
 
-      document.querySelectorAll("span.level1").forEach((elem) => {
-        if (selectedRealm === wildcard) {
-          elem.parentElement.classList.remove("hidden");
-          elem.parentElement.classList.remove("display-block");
+      return null;
+    }
+
+    // returns true if the anchor has been materialised
+    function revealAnchor(id) {
+      if (!id || document.getElementById(id)) {
+        return false;
+      }
+
+      const placeholder = findPlaceholder(id);
+      if (placeholder) {
+        materialize(placeholder);
+      }
+      return placeholder !== null;
+    }
+
+    document.querySelectorAll(".lazy").forEach((placeholder) =>
+      lazyObserver.observe(placeholder)
+    );
+
+    // materialised before the browser follows the link
+    document.addEventListener("click", function (event) {
+      const link = event.target.closest('a[href^="#"]');
+      if (link) {
+        revealAnchor(decodeURIComponent(link.getAttribute("href").slice(1)));
+      }
+    });
+
+    // the browser doesn't scroll to the anchor that didn't exist on navigation
+    function revealHash() {
+      const id = decodeURIComponent(window.location.hash.slice(1));
+      if (revealAnchor(id)) {
+        document.getElementById(id).scrollIntoView();
+      }
+    }
+
+    window.addEventListener("hashchange", revealHash);
+    revealHash();
+
+    // realm specifics filter: the elements of a realm have its class token
+    // (the option value), so the filter is a single stylesheet swap
+    const realmStyle = document.getElementById("realmStyle");
+
+    realmSelect.addEventListener("change", function handleSelectChange(event) {
+      const selectedRealm = event.target.value;
+      const isFiltered = selectedRealm !== wildcard;
+
+      realmStyle.textContent = isFiltered
+        ? `.config code:not(.${selectedRealm}),
+           .lazy:not(.${selectedRealm}),
+           li.level1:not(.${selectedRealm}),
+           li.level1 li:not(.${selectedRealm}),
+           .count:not(.realm-count) {
+             display: none;
+           }
+           .realm-count.${selectedRealm} {
+             display: inline;
+           }`
+        : "";
+
+      document.querySelectorAll("li.level1 > details").forEach((details) => {
+        if (isFiltered) {
+          details.setAttribute("open", "");
         } else {
-          const realms = elem.getAttribute("data-realms").split(" ");
-          if (realms.includes(selectedRealm)) {
-            elem.parentElement.classList.remove("hidden");
-            elem.parentElement.classList.add("display-block");
-          } else {
-            elem.parentElement.classList.add("hidden");
-            elem.parentElement.classList.remove("display-block");
-          }
+          details.removeAttribute("open");
         }
       });
 
-      document.querySelectorAll("li.level1").forEach((li) => {
-        if (selectedRealm === wildcard) {
-          li.classList.remove("hidden");
-          li.classList.remove("display-block");
+      window.scrollTo({ top: 0, behavior: "smooth" });
+
+      // the matches of the other realms are no longer shown
+      if (lastQuery) {
+        search();
+      }
+    });
+
+    // search: the page embeds the sorted value tokens and the elements that
+    // have them (see renderer._get_search_index()), so a lookup is a binary
+    // search that never scans the page; a query ending with "*" matches the
+    // values starting with the rest of it, like the --query CLI option
+    const prefixWildcard = "*";
+    const searchInput = document.getElementById("searchInput");
+    const searchStatus = document.getElementById("searchStatus");
+    let searchIndex = null;
+    let lastQuery = "";
+    let matches = [];
+    let matchPos = -1;
+    let currentMatch = null;
 
-          li.querySelectorAll("span.count").forEach((span) =>
-            span.classList.remove("hidden")
-          );
+    // parsed on the first search, so that it doesn't slow down the page load
+    function getSearchIndex() {
+      if (searchIndex === null) {
+        searchIndex = JSON.parse(
+          document.getElementById("searchIndex").textContent
+        );
+      }
+      return searchIndex;
+    }
 
-          li.querySelectorAll(":scope > details").forEach((details) =>
-            details.removeAttribute("open")
-          );
+    // position of the first token that isn't less than the value
+    function lowerBound(tokens, value) {
+      let lo = 0;
+      let hi = tokens.length;
+      while (lo < hi) {
+        const mid = (lo + hi) >>> 1;
+        if (tokens[mid] < value) {
+          lo = mid + 1;
         } else {
-          const hasVisibleLeafs =
-            li.querySelectorAll(".display-block").length > 0;
-
-          if (hasVisibleLeafs) {
-            li.classList.remove("hidden");
-            li.classList.add("display-block");
-          } else {
-            li.classList.add("hidden");
-            li.classList.remove("display-block");
-          }
+          hi = mid;
+        }
+      }
+      return lo;
+    }
+
+    // returns the IDs of the matching elements of the selected realm in the
+    // config order
+    function findElements(query) {
+      const index = getSearchIndex();
+      const isPrefix = query.endsWith(prefixWildcard);
+      const prefix = isPrefix ? query.slice(0, -prefixWildcard.length) : query;
+      const realm = realmSelect.value;
+      const found = new Set();
 
-          li.querySelectorAll("span.count").forEach((span) =>
-            span.classList.add("hidden")
-          );
+      if (!prefix) {
+        return [];
+      }
 
-          li.querySelectorAll(":scope > details").forEach((details) =>
-            details.setAttribute("open", "")
-          );
+      for (let i = lowerBound(index.tokens, prefix); i < index.tokens.length; i++) {
+        const token = index.tokens[i];
+        if (token !== prefix && !(isPrefix && token.startsWith(prefix))) {
+          break;
         }
+        index.elements[i].forEach((id) => found.add(id));
+      }
 
-        window.scrollTo({ top: 0, behavior: "smooth" });
-      });
+      return [...found]
+        .filter(
+          (id) =>
+            realm === wildcard || index.realms[id].split(" ").includes(realm)
+        )
+        .sort((a, b) => a - b);
+    }
+
+    function showMatch(pos) {
+      if (currentMatch) {
+        currentMatch.classList.remove("search-match");
+        currentMatch = null;
+      }
+
+      matchPos = pos;
+      if (pos < 0) {
+        searchStatus.textContent = lastQuery ? "no matches" : "";
+        return;
+      }
+
+      const id = getSearchIndex().anchors[matches[pos]];
+      revealAnchor(id);
+      const marker = document.getElementById(id);
+      currentMatch = marker.parentElement;
+      currentMatch.classList.add("search-match");
+      marker.scrollIntoView();
+      searchStatus.textContent = `${pos + 1} of ${matches.length}`;
+    }
+
+    function search() {
+      lastQuery = searchInput.value.trim();
+      matches = lastQuery ? findElements(lastQuery) : [];
+      showMatch(matches.length ? 0 : -1);
+    }
+
+    // Enter goes to the next match, Shift+Enter to the previous one
+    searchInput.addEventListener("keydown", function (event) {
+      if (event.key !== "Enter") {
+        return;
+      }
+
+      event.preventDefault();
+      if (searchInput.value.trim() !== lastQuery) {
+        search();
+      } else if (matches.length) {
+        const step = event.shiftKey ? matches.length - 1 : 1;
+        showMatch((matchPos + step) % matches.length);
+      }
+    });
+
+    // cleared with the "x" button or by deleting the query
+    searchInput.addEventListener("input", function () {
+      if (!searchInput.value.trim()) {
+        search();
+      }
     });
   },
   false
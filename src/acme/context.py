@@ -1,156 +1,241 @@
 from enum import Enum
-from typing import Any
+from typing import Any, Iterator
 
 import util as u
 
 
+# top-level config elements, the value is the section name
 class ConfigElement(Enum):
-    CODEC_POLICY = 0
-    NETWORK_INTERFACE = 1
-    REALM = 2
-    RESPONSE_MAP = 3
-    SESSION_CONSTRAINTS = 4
-    SIP_MANIPULATION = 5
-
-
-class Mapping:
-    def __init__(self) -> None:
-        self._map: dict[str, set[str]] = {}
-
-    def get(self, key: str) -> set[str]:
-        return self._map.get(key, set())
-
-    def add(self, key: str, value: str, is_create_key: bool = True) -> None:
-        if not key or not value:
-            return
-
-        values = self._map.get(key)
-        if values:
-            values.add(value)
-        elif is_create_key:
-            self._map[key] = set([value])
-
-
+    CODEC_POLICY = "codec-policy"
+    LOCAL_POLICY = "local-policy"
+    NETWORK_INTERFACE = "network-interface"
+    REALM = "realm-config"
+    REALM_GROUP = "realm-group"
+    RESPONSE_MAP = "response-map"
+    SESSION_AGENT = "session-agent"
+    SESSION_AGENT_GROUP = "session-group"
+    SESSION_CONSTRAINTS = "session-constraints"
+    SESSION_TRANSLATION = "session-translation"
+    SIP_INTERFACE = "sip-interface"
+    SIP_MANIPULATION = "sip-manipulation"
+    STEERING_POOL = "steering-pool"
+    TRANSLATION_RULES = "translation-rules"
+
+
+# Attributes that identify an element of the section, its identity is their
+# values joined by ":" (e.g. "M00:0" for a network interface), see
+# get_element_key(). It's the ID the element is referenced by, the key the
+# diff matches elements by and the label of the element in the sidebar.
+ELEMENT_KEYS: dict[str, tuple[str, ...]] = {
+    "access-control": ("realm-id", "source-address", "destination-address"),
+    "codec-policy": ("name",),
+    "host-route": ("dest-network",),
+    "host-routes": ("dest-network",),
+    "local-policy": ("from-address", "to-address", "source-realm"),
+    "network-interface": ("name", "sub-port-id"),
+    "phy-interface": ("name",),
+    "realm-config": ("identifier",),
+    "realm-group": ("name",),
+    "response-map": ("name",),
+    "session-agent": ("hostname",),
+    "session-constraints": ("name",),
+    "session-group": ("group-name",),
+    "session-translation": ("id",),
+    "sip-advanced-logging": ("name",),
+    "sip-feature": ("name",),
+    "sip-interface": ("realm-id",),
+    "sip-manipulation": ("name",),
+    "snmp-community": ("community-name",),
+    "steering-pool": ("ip-address", "start-port", "realm-id"),
+    "translation-rules": ("id",),
+    "trap-receiver": ("ip-address",),
+}
+
+# attributes that identify an element of any other section
+_FALLBACK_KEYS: tuple[str, ...] = ("id", "name")
+
+# reference-bearing attributes of each element, nested attributes are given
+# by their path, e.g. local-policy > policy-attribute > realm
+_MANIPULATION_REFS: list[tuple[tuple[str, ...], ConfigElement]] = [
+    (("in-manipulationid",), ConfigElement.SIP_MANIPULATION),
+    (("out-manipulationid",), ConfigElement.SIP_MANIPULATION),
+]
+_TRANSLATION_REFS: list[tuple[tuple[str, ...], ConfigElement]] = [
+    (("in-translationid",), ConfigElement.SESSION_TRANSLATION),
+    (("out-translationid",), ConfigElement.SESSION_TRANSLATION),
+]
+_REFERENCES: dict[ConfigElement, list[tuple[tuple[str, ...], ConfigElement]]] = {
+    ConfigElement.LOCAL_POLICY: [
+        (("source-realm",), ConfigElement.REALM),
+        (("realm",), ConfigElement.REALM),
+        (("next-hop",), ConfigElement.SESSION_AGENT),
+        (("policy-attribute", "realm"), ConfigElement.REALM),
+        (("policy-attribute", "next-hop"), ConfigElement.SESSION_AGENT),
+    ],
+    ConfigElement.REALM: [
+        (("parent-realm",), ConfigElement.REALM),
+        (("network-interfaces",), ConfigElement.NETWORK_INTERFACE),
+        *_MANIPULATION_REFS,
+        *_TRANSLATION_REFS,
+        (("codec-policy",), ConfigElement.CODEC_POLICY),
+        (("constraint-name",), ConfigElement.SESSION_CONSTRAINTS),
+    ],
+    ConfigElement.REALM_GROUP: [
+        (("source-realms",), ConfigElement.REALM),
+        (("destination-realms",), ConfigElement.REALM),
+    ],
+    ConfigElement.SESSION_AGENT: [
+        (("realm-id",), ConfigElement.REALM),
+        (("egress-realm-id",), ConfigElement.REALM),
+        *_MANIPULATION_REFS,
+        *_TRANSLATION_REFS,
+        (("response-map",), ConfigElement.RESPONSE_MAP),
+        (("constraint-name",), ConfigElement.SESSION_CONSTRAINTS),
+    ],
+    ConfigElement.SESSION_AGENT_GROUP: [
+        (("dest",), ConfigElement.SESSION_AGENT),
+    ],
+    ConfigElement.SESSION_TRANSLATION: [
+        (("rules-calling",), ConfigElement.TRANSLATION_RULES),
+        (("rules-called",), ConfigElement.TRANSLATION_RULES),
+    ],
+    ConfigElement.SIP_INTERFACE: [
+        (("realm-id",), ConfigElement.REALM),
+        *_MANIPULATION_REFS,
+        (("response-map",), ConfigElement.RESPONSE_MAP),
+        (("constraint-name",), ConfigElement.SESSION_CONSTRAINTS),
+    ],
+    ConfigElement.STEERING_POOL: [
+        (("realm-id",), ConfigElement.REALM),
+        (("network-interface",), ConfigElement.NETWORK_INTERFACE),
+    ],
+}
+
+# next hop refers to a session agent group if prefixed
+_GROUP_PREFIX: str = "SAG:"
+
+
+# A reference from an attribute of one config element to another element.
+# The source is identified by its index in the section (and its ID if it
+# has one), the target by its ID, which may not exist in the config.
+class Reference:
+    __slots__ = (
+        "source",
+        "source_idx",
+        "source_id",
+        "attribute",
+        "target",
+        "target_id",
+    )
+
+    def __init__(
+        self,
+        source: ConfigElement,
+        source_idx: int,
+        source_id: str,
+        attribute: str,
+        target: ConfigElement,
+        target_id: str,
+    ) -> None:
+        self.source: ConfigElement = source
+        self.source_idx: int = source_idx
+        self.source_id: str = source_id
+        self.attribute: str = attribute
+        self.target: ConfigElement = target
+        self.target_id: str = target_id
+
+
+# Cross-reference index of the config, built in a single traversal.
+# Both directions are kept, so "what does X reference" and "who references
+# X" are dict lookups. All collections preserve the config order.
 class Context:
     def __init__(self, json_cfg: dict[str, Any]) -> None:
-        maps: dict[ConfigElement, Mapping] = {
-            ConfigElement.CODEC_POLICY: Mapping(),  # realm
-            ConfigElement.NETWORK_INTERFACE: Mapping(),  # realm
-            ConfigElement.REALM: Mapping(),  # not used
-            ConfigElement.RESPONSE_MAP: Mapping(),  # sip-interface, session-agent
-            ConfigElement.SESSION_CONSTRAINTS: Mapping(),  # realm, sip-interface
-            ConfigElement.SIP_MANIPULATION: Mapping(),  # realm, sip-interface, session-agent
-        }
-        self.realm_mappings = maps
-
-        registry: dict[ConfigElement, dict[str, int]] = {
-            ConfigElement.CODEC_POLICY: {},
-            ConfigElement.NETWORK_INTERFACE: {},
-            ConfigElement.REALM: {},
-            ConfigElement.RESPONSE_MAP: {},
-            ConfigElement.SESSION_CONSTRAINTS: {},
-            ConfigElement.SIP_MANIPULATION: {},
-        }
-        self.index_registry = registry
-
-        for idx, realm in enumerate(u.ensure_list(json_cfg.get("realm-config"))):
-            realm_id: str = realm.get("identifier")
-            registry.get(ConfigElement.REALM, {})[realm_id] = idx
-
-            for net in u.ensure_list(realm.get("network-interfaces")):
-                self._enum_map(maps, ConfigElement.NETWORK_INTERFACE).add(net, realm_id)
-
-            if u.contains_not_empty(realm, "in-manipulationid"):
-                self._enum_map(maps, ConfigElement.SIP_MANIPULATION).add(
-                    realm.get("in-manipulationid"), realm_id
-                )
-
-            if u.contains_not_empty(realm, "out-manipulationid"):
-                self._enum_map(maps, ConfigElement.SIP_MANIPULATION).add(
-                    realm.get("out-manipulationid"), realm_id
-                )
-
-            if u.contains_not_empty(realm, "codec-policy"):
-                self._enum_map(maps, ConfigElement.CODEC_POLICY).add(
-                    realm.get("codec-policy"), realm_id
-                )
-
-            if u.contains_not_empty(realm, "constraint-name"):
-                self._enum_map(maps, ConfigElement.SESSION_CONSTRAINTS).add(
-                    realm.get("constraint-name"), realm_id
-                )
-
-        for sip_interface in u.ensure_list(json_cfg.get("sip-interface")):
-            realm_id: str = sip_interface.get("realm-id")
-
-            if u.contains_not_empty(sip_interface, "in-manipulationid"):
-                self._enum_map(maps, ConfigElement.SIP_MANIPULATION).add(
-                    sip_interface.get("in-manipulationid"), realm_id
-                )
-
-            if u.contains_not_empty(sip_interface, "out-manipulationid"):
-                self._enum_map(maps, ConfigElement.SIP_MANIPULATION).add(
-                    sip_interface.get("out-manipulationid"), realm_id
-                )
-
-            if u.contains_not_empty(sip_interface, "response-map"):
-                self._enum_map(maps, ConfigElement.SESSION_CONSTRAINTS).add(
-                    sip_interface.get("response-map"), realm_id
-                )
-
-            if u.contains_not_empty(sip_interface, "constraint-name"):
-                self._enum_map(maps, ConfigElement.SESSION_CONSTRAINTS).add(
-                    sip_interface.get("constraint-name"), realm_id
-                )
-
-        for agent in u.ensure_list(json_cfg.get("session-agent")):
-            realm_id: str = agent.get("realm-id") or agent.get("egress-realm-id")
-
-            if u.contains_not_empty(agent, "in-manipulationid"):
-                self._enum_map(maps, ConfigElement.SIP_MANIPULATION).add(
-                    agent.get("in-manipulationid"), realm_id
-                )
-
-            if u.contains_not_empty(agent, "out-manipulationid"):
-                self._enum_map(maps, ConfigElement.SIP_MANIPULATION).add(
-                    agent.get("out-manipulationid"), realm_id
-                )
-
-            if u.contains_not_empty(agent, "response-map"):
-                self._enum_map(maps, ConfigElement.SESSION_CONSTRAINTS).add(
-                    agent.get("response-map"), realm_id
-                )
-
-        for idx, policy in enumerate(u.ensure_list(json_cfg.get("codec-policy"))):
-            name: str = policy.get("name", "")
-            if name:
-                registry.get(ConfigElement.CODEC_POLICY, {})[name] = idx
-
-        for idx, net in enumerate(u.ensure_list(json_cfg.get("network-interface"))):
-            net_id: str = Context.get_network_interface_id(net)
-            if net_id:
-                registry.get(ConfigElement.NETWORK_INTERFACE, {})[net_id] = idx
-
-        for idx, resp_map in enumerate(u.ensure_list(json_cfg.get("response-map"))):
-            name: str = resp_map.get("name", "")
-            if name:
-                registry.get(ConfigElement.RESPONSE_MAP, {})[name] = idx
-
-        for idx, constr in enumerate(
-            u.ensure_list(json_cfg.get("session-constraints"))
-        ):
-            name: str = constr.get("name", "")
-            if name:
-                registry.get(ConfigElement.SESSION_CONSTRAINTS, {})[name] = idx
-
-        for idx, manip in enumerate(u.ensure_list(json_cfg.get("sip-manipulation"))):
-            name: str = manip.get("name", "")
-            if name:
-                registry.get(ConfigElement.SIP_MANIPULATION, {})[name] = idx
-
-    # returns the list of realms associated with the configuration element
-    def get_realms(self, type: ConfigElement, key: str) -> set[str]:
-        return self._enum_map(self.realm_mappings, type).get(key)
+        # element ID -> index in the section
+        self.index_registry: dict[ConfigElement, dict[str, int]] = {}
+        self.section_sizes: dict[ConfigElement, int] = {}
+        # keyed by section name rather than by enum member, which hashes slowly
+        self._references: dict[tuple[str, int], list[Reference]] = {}
+        self._referrers: dict[tuple[str, str], list[Reference]] = {}
+        self._realms: dict[tuple[str, str], list[str]] = {}
+
+        references = self._references
+        referrers = self._referrers
+
+        for section, value in json_cfg.items():
+            try:
+                element: ConfigElement = ConfigElement(section)
+            except ValueError:
+                continue
+
+            items: list[Any] = u.ensure_list(value)
+            registry: dict[str, int] = self.index_registry.setdefault(element, {})
+            self.section_sizes[element] = len(items)
+            ref_paths = _REFERENCES.get(element, [])
+
+            for idx, item in enumerate(items):
+                if not u.is_dict(item):
+                    continue
+
+                element_id: str = Context.get_element_id(element, item)
+                if element_id:
+                    registry[element_id] = idx
+
+                item_refs: list[Reference] = []
+                for path, target in ref_paths:
+                    ref_value: Any = item.get(path[0])
+                    if not ref_value:
+                        continue
+
+                    for target_id in (
+                        (ref_value,)
+                        if len(path) == 1 and isinstance(ref_value, str)
+                        else _get_values(ref_value, path[1:])
+                    ):
+                        ref_target, ref_target_id = _resolve(target, target_id)
+                        ref = Reference(
+                            element,
+                            idx,
+                            element_id,
+                            path[-1],
+                            ref_target,
+                            ref_target_id,
+                        )
+                        item_refs.append(ref)
+                        referrers.setdefault(
+                            (ref_target.value, ref_target_id), []
+                        ).append(ref)
+
+                if item_refs:
+                    references[(section, idx)] = item_refs
+
+    # returns the references of the element at the given index
+    def get_references(self, type: ConfigElement, idx: int) -> list[Reference]:
+        return self._references.get((type.value, idx), [])
+
+    # returns the references to the element with the given ID
+    def get_referrers(self, type: ConfigElement, key: str) -> list[Reference]:
+        return self._referrers.get((type.value, key), [])
+
+    # returns the list of realms associated with the configuration element,
+    # i.e. the realms of the elements that reference it
+    def get_realms(self, type: ConfigElement, key: str) -> list[str]:
+        realms: list[str] | None = self._realms.get((type.value, key))
+        if realms is not None:
+            return realms
+
+        found: dict[str, None] = {}
+        for ref in self.get_referrers(type, key):
+            if ref.source is ConfigElement.REALM:
+                found[ref.source_id] = None
+                continue
+
+            for source_ref in self.get_references(ref.source, ref.source_idx):
+                if source_ref.target is ConfigElement.REALM:
+                    found[source_ref.target_id] = None
+
+        realms = [realm for realm in found if realm]
+        self._realms[(type.value, key)] = realms
+        return realms
 
     # returns the configuration element index in list and the list length
     def get_element_pos(self, type: ConfigElement, key: str) -> tuple[int, int]:
@@ -158,16 +243,17 @@ class Context:
         if not registry:
             return (-1, -1)
 
-        return (registry.get(key, -1), len(registry))
-
-    def _enum_map(self, map: dict[ConfigElement, Mapping], elem: Enum) -> Mapping:
-        return map.get(elem)  # type: ignore
+        return (registry.get(key, -1), self.section_sizes.get(type, 0))
 
     ###########################################################################
 
+    @staticmethod
+    def get_element_id(type: ConfigElement, value: dict[str, Any]) -> str:
+        return get_element_key(type.value, value)
+
     @staticmethod
     def get_network_interface_id(net: dict[str, Any]) -> str:
-        return f'{net.get("name")}:{net.get("sub-port-id")}'
+        return get_element_key(ConfigElement.NETWORK_INTERFACE.value, net)
 
     @staticmethod
     def get_first_sip_port(sip_interface: dict[str, Any]) -> str | None:
@@ -222,3 +308,51 @@ class Context:
                     hops.append(attr_hop)
 
         return hops
+
+
+# returns the identity of the element (see ELEMENT_KEYS), which is unique in
+# the section unless the config has duplicates; empty if it has none
+def get_element_key(section: str, value: Any) -> str:
+    if not u.is_dict(value):
+        return str(value)
+
+    attributes: tuple[str, ...] | None = ELEMENT_KEYS.get(section)
+    if attributes:
+        parts: list[str] = [_format_key_part(value.get(attr)) for attr in attributes]
+        if any(parts):
+            return ":".join(parts)
+
+    for attr in _FALLBACK_KEYS:
+        if u.is_string(value.get(attr)) and value.get(attr):
+            return value[attr]
+
+    return ""
+
+
+###############################################################################
+
+
+def _format_key_part(value: Any) -> str:
+    if u.is_string(value):
+        return value
+    if u.is_string_list(value):
+        return ",".join(value)
+    return ""
+
+
+# yields non-empty string values at the given path, lists are flattened
+def _get_values(value: Any, path: tuple[str, ...]) -> Iterator[str]:
+    if isinstance(value, str):
+        if value and not path:
+            yield value
+    elif isinstance(value, list):
+        for item in value:
+            yield from _get_values(item, path)
+    elif isinstance(value, dict) and path and path[0] in value:
+        yield from _get_values(value[path[0]], path[1:])
+
+
+def _resolve(target: ConfigElement, target_id: str) -> tuple[ConfigElement, str]:
+    if target is ConfigElement.SESSION_AGENT and target_id.startswith(_GROUP_PREFIX):
+        return (ConfigElement.SESSION_AGENT_GROUP, target_id[len(_GROUP_PREFIX) :])
+    return (target, target_id)
@@ -0,0 +1,187 @@
+import json
+from enum import Enum
+from typing import Any
+
+import util as u
+from acme.context import get_element_key
+
+__all__ = ["ChangeType", "ElementChange", "FieldChange", "diff"]
+
+# separates the attribute names in the path of a nested attribute
+PATH_SEPARATOR: str = " > "
+
+# distinguishes an absent attribute from an attribute without value
+_MISSING: Any = object()
+
+
+class ChangeType(Enum):
+    ADDED = "added"
+    REMOVED = "removed"
+    CHANGED = "changed"
+
+
+# a changed attribute of an element, the values are formatted as text and
+# are None if the attribute is absent
+class FieldChange:
+    __slots__ = ("path", "old", "new")
+
+    def __init__(self, path: str, old: str | None, new: str | None) -> None:
+        self.path: str = path
+        self.old: str | None = old
+        self.new: str | None = new
+
+
+# an added, removed or changed top-level element (or list item)
+class ElementChange:
+    __slots__ = ("section", "key", "type", "old", "new", "fields")
+
+    def __init__(
+        self,
+        section: str,
+        key: str,
+        type: ChangeType,
+        old: Any = None,
+        new: Any = None,
+        fields: list[FieldChange] | None = None,
+    ) -> None:
+        self.section: str = section
+        self.key: str = key
+        self.type: ChangeType = type
+        self.old: Any = old
+        self.new: Any = new
+        self.fields: list[FieldChange] = fields or []
+
+
+# Compares two configs parsed by to_json(). List elements are matched by their
+# identity (see context.ELEMENT_KEYS) through hash maps, rather than by position or
+# pairwise, so an inserted element doesn't shift the rest of the section and
+# the time is linear in the config size. Sections are in the order of the old
+# config followed by the new ones, the added elements of a section follow the
+# removed and changed ones.
+def diff(old_cfg: dict[str, Any], new_cfg: dict[str, Any]) -> list[ElementChange]:
+    changes: list[ElementChange] = []
+
+    for section in {**old_cfg, **new_cfg}:
+        old_value: Any = old_cfg.get(section, _MISSING)
+        new_value: Any = new_cfg.get(section, _MISSING)
+        if old_value == new_value:
+            continue
+
+        # a scalar section is a single element
+        if not _is_element_list(old_value) or not _is_element_list(new_value):
+            if old_value is _MISSING or new_value is _MISSING:
+                changes.append(
+                    _added_or_removed(section, section, old_value, new_value)
+                )
+            else:
+                fields: list[FieldChange] = []
+                _diff_values(old_value, new_value, section, fields)
+                changes.append(
+                    ElementChange(
+                        section,
+                        section,
+                        ChangeType.CHANGED,
+                        old_value,
+                        new_value,
+                        fields,
+                    )
+                )
+            continue
+
+        old_items: dict[str, Any] = _index_elements(section, old_value)
+        new_items: dict[str, Any] = _index_elements(section, new_value)
+
+        for key, old_item in old_items.items():
+            new_item: Any = new_items.get(key, _MISSING)
+            if new_item is _MISSING:
+                changes.append(_added_or_removed(section, key, old_item, _MISSING))
+            elif old_item != new_item:
+                fields = []
+                _diff_values(old_item, new_item, "", fields)
+                changes.append(
+                    ElementChange(
+                        section, key, ChangeType.CHANGED, old_item, new_item, fields
+                    )
+                )
+
+        for key, new_item in new_items.items():
+            if key not in old_items:
+                changes.append(_added_or_removed(section, key, _MISSING, new_item))
+
+    return changes
+
+
+###############################################################################
+
+
+# missing sections are compared as lists, so that their elements are
+# reported one by one
+def _is_element_list(value: Any) -> bool:
+    return value is _MISSING or u.is_dict(value) or u.is_list(value)
+
+
+# Elements are keyed by their identity. The elements without one are keyed by
+# their position (or the section name if it's not a list), and duplicates by
+# the identity and the occurrence number, so nothing is lost if the identity
+# isn't unique.
+def _index_elements(section: str, value: Any) -> dict[str, Any]:
+    items: dict[str, Any] = {}
+    occurrences: dict[str, int] = {}
+
+    for idx, item in enumerate([] if value is _MISSING else u.ensure_list(value)):
+        key: str = get_element_key(section, item) or (
+            section if u.is_dict(value) else f"#{idx}"
+        )
+        occurrence: int = occurrences.get(key, 0) + 1
+        occurrences[key] = occurrence
+        items[f"{key} ({occurrence})" if occurrence > 1 else key] = item
+
+    return items
+
+
+def _added_or_removed(section: str, key: str, old: Any, new: Any) -> ElementChange:
+    if old is _MISSING:
+        return ElementChange(section, key, ChangeType.ADDED, new=new)
+    return ElementChange(section, key, ChangeType.REMOVED, old=old)
+
+
+# Adds the changed leaf values to the list. Nested dicts are compared by key
+# and nested lists of dicts by position, any other value as a whole.
+def _diff_values(old: Any, new: Any, path: str, fields: list[FieldChange]) -> None:
+    if old == new:
+        return
+
+    if u.is_dict(old) and u.is_dict(new):
+        for key in {**old, **new}:
+            _diff_values(
+                old.get(key, _MISSING),
+                new.get(key, _MISSING),
+                f"{path}{PATH_SEPARATOR}{key}" if path else key,
+                fields,
+            )
+    elif (
+        u.is_list(old)
+        and u.is_list(new)
+        and not (u.is_string_list(old) and u.is_string_list(new))
+    ):
+        for idx in range(max(len(old), len(new))):
+            _diff_values(
+                old[idx] if idx < len(old) else _MISSING,
+                new[idx] if idx < len(new) else _MISSING,
+                f"{path}[{idx}]",
+                fields,
+            )
+    else:
+        fields.append(FieldChange(path, _format_value(old), _format_value(new)))
+
+
+def _format_value(value: Any) -> str | None:
+    if value is _MISSING:
+        return None
+    if value is None:
+        return ""
+    if u.is_string(value):
+        return value
+    if u.is_string_list(value):
+        return "\n".join(value)
+    return json.dumps(value, indent=2)
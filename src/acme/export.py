@@ -0,0 +1,56 @@
+import json
+from typing import Any, Iterator, TextIO
+
+import util as u
+
+__all__ = ["iter_records", "write_json", "write_ndjson"]
+
+JSON_INDENT: int = 4
+
+
+# Writes the config as an indented JSON object, the same text as
+# json.dumps(json_cfg, indent=4). Every list element of a section is
+# serialized on its own, so the whole document is never held in memory.
+def write_json(out: TextIO, json_cfg: dict[str, Any]) -> None:
+    item_indent: str = "\n" + " " * JSON_INDENT * 2
+
+    out.write("{")
+    for section_idx, (section, value) in enumerate(json_cfg.items()):
+        out.write(",\n" if section_idx else "\n")
+        out.write(" " * JSON_INDENT + json.dumps(section) + ": ")
+
+        if not u.is_list(value) or not value:
+            out.write(_dumps(value).replace("\n", "\n" + " " * JSON_INDENT))
+            continue
+
+        out.write("[")
+        for idx, item in enumerate(value):
+            out.write("," if idx else "")
+            # JSON strings can't contain raw line breaks, so they're safe to indent
+            out.write(item_indent + _dumps(item).replace("\n", item_indent))
+        out.write("\n" + " " * JSON_INDENT + "]")
+
+    out.write("\n}" if json_cfg else "}")
+
+
+# Writes the config as newline-delimited JSON, one record per top-level
+# element (see iter_records()).
+def write_ndjson(out: TextIO, json_cfg: dict[str, Any]) -> None:
+    for record in iter_records(json_cfg):
+        out.write(json.dumps(record, separators=(",", ":")))
+        out.write("\n")
+
+
+# yields {"section": ..., "index": ..., "value": ...} for every top-level
+# element, the index is the position in the section (0 for single elements)
+def iter_records(json_cfg: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    for section, value in json_cfg.items():
+        for idx, item in enumerate(value if u.is_list(value) else [value]):
+            yield {"section": section, "index": idx, "value": item}
+
+
+###############################################################################
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, indent=JSON_INDENT)
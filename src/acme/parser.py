@@ -1,9 +1,19 @@
+import hashlib
 from enum import Enum
-from traceback import print_exc
-from typing import Any
+from functools import cache
+from typing import Any, Callable, Iterable, Iterator
 from env import get_config
 
-__all__ = ["to_json"]
+__all__ = [
+    "DiagnosticType",
+    "Diagnostics",
+    "ParserOptions",
+    "SectionCache",
+    "get_default_options",
+    "parse",
+    "parse_stream",
+    "to_json",
+]
 
 _TOP_LEVEL_CFG: set[str] = {
     "access-control",
@@ -159,34 +169,204 @@ _TOP_LEVEL_CFG: set[str] = {
 }
 
 
-class _CfgLine:
-    def __init__(self, line: str, top_level_items: set[str] = _TOP_LEVEL_CFG):
-        self.line: str = line
-        self.offset: int = -1
-        self.left: str | None = None
-        self.right: str | None = None
-        self.top_level_items: set[str] = top_level_items
-
-        if len(self.line) > 0:
-            pair_line: str
-            self.offset: int
-            pair_line, self.offset = _get_line_offset(line)
+# Parser settings, meant to be created once and reused for any number of
+# configs. The extra top-level items are added to the built-in ones.
+class ParserOptions:
+    def __init__(
+        self,
+        top_level_items: Iterable[str] = (),
+        verbose: bool = False,
+        max_samples: int = 10,
+        intern: bool = False,
+    ) -> None:
+        self.top_level_items: frozenset[str] = frozenset(
+            _TOP_LEVEL_CFG.union(top_level_items)
+        )
+        # print every diagnostic as it's found
+        self.verbose: bool = verbose
+        # number of diagnostics of each type to keep
+        self.max_samples: int = max_samples
+        # share equal keys and values of the tree instead of keeping a copy
+        # per line, see _parse_lines()
+        self.intern: bool = intern
+
+    def create_diagnostics(self) -> "Diagnostics":
+        return Diagnostics(self.max_samples, print if self.verbose else None)
+
+    # ID of the settings that affect the parsing result
+    def get_id(self) -> str:
+        return ",".join(sorted(self.top_level_items - _TOP_LEVEL_CFG))
+
+
+class DiagnosticType(Enum):
+    IGNORED_LINE = "ignored line"
+    ERROR = "error"
+
+
+# Collects parser diagnostics: counts them by type and keeps the first
+# max_samples of each type as (line number, message), so that noisy input
+# (e.g. session logs with thousands of prompt lines) costs only a counter
+# increment per line. Callers decide what to surface. If sink is set, every
+# diagnostic is also passed to it as a formatted message.
+class Diagnostics:
+    def __init__(
+        self, max_samples: int = 10, sink: Callable[[str], Any] | None = None
+    ) -> None:
+        self.counts: dict[DiagnosticType, int] = {}
+        self.samples: dict[DiagnosticType, list[tuple[int, str]]] = {}
+        self.max_samples: int = max_samples
+        self.sink: Callable[[str], Any] | None = sink
+
+    # takes the raw line (and the error, if any) rather than a message, the
+    # message is only formatted when it's kept as a sample or sent to the sink
+    def add(
+        self,
+        diag_type: DiagnosticType,
+        line_no: int,
+        line: str,
+        error: Exception | None = None,
+    ) -> None:
+        count: int = self.counts.get(diag_type, 0)
+        self.counts[diag_type] = count + 1
+
+        if count >= self.max_samples and not self.sink:
+            return
+
+        message: str = repr(line) if error is None else f"{line!r}: {error!r}"
+        if count < self.max_samples:
+            self.samples.setdefault(diag_type, []).append((line_no, message))
+
+        if self.sink:
+            self.sink(f"line {line_no}: {diag_type.value}: {message}")
+
+    def get_count(self, diag_type: DiagnosticType) -> int:
+        return self.counts.get(diag_type, 0)
+
+    def __bool__(self) -> bool:
+        return bool(self.counts)
+
+    # e.g. "120 ignored lines, 1 error"
+    def __str__(self) -> str:
+        return ", ".join(
+            f"{count} {diag_type.value}{'s' if count > 1 else ''}"
+            for diag_type, count in self.counts.items()
+        )
 
-            pair: list[str] = pair_line.split(" ", 1)
-            self.left = pair[0].strip()
-            if len(pair) == 2:
-                self.right = pair[1].strip()
 
-    def is_garbage(self) -> bool:
-        return self.offset == -1 or (
-            self.is_top() and self.left not in self.top_level_items
+# Parses configs and keeps their parsed top-level sections between calls, so
+# that a changed config is only parsed again where its source differs (e.g.
+# when a watched file is updated). The source is split before the top-level
+# lines, and each section is hashed, parsed on its own and merged into the
+# tree the way _parse_lines() adds top-level branches. Only the sections of
+# the last parsed config are kept, so a cache is meant for a single file.
+#
+# The parser state doesn't cross the section boundaries as long as each
+# section only adds branches of its top-level item and has no errors. If
+# that's not the case (e.g. a top-level item with a value), the whole config
+# is parsed again, so the result is always the same as parse() returns.
+class SectionCache:
+    def __init__(self, options: ParserOptions | None = None) -> None:
+        self.options: ParserOptions = options or get_default_options()
+        self._sections: dict[bytes, _Section] = {}
+
+    def parse(
+        self, source: Iterable[str], diagnostics: Diagnostics | None = None
+    ) -> tuple[dict[str, Any], Diagnostics]:
+        if diagnostics is None:
+            diagnostics = self.options.create_diagnostics()
+
+        lines: list[str] = list(_split_lines(source))
+        tree: dict[str, Any] = {}
+        sections: dict[bytes, _Section] = {}
+        parsed: list[tuple[int, _Section]] = []
+
+        for start, end in _split_sections(lines, self.options.top_level_items):
+            text: str = "\n".join(lines[start:end])
+            key: bytes = hashlib.blake2b(
+                text.encode(errors="surrogatepass"), digest_size=16
+            ).digest()
+
+            section: _Section | None = sections.get(key) or self._sections.get(key)
+            if section is None:
+                section = _Section(lines[start:end], self.options)
+            sections[key] = section
+
+            if section.has_errors or (start > 0 and not section.is_mergeable):
+                self._sections = sections
+                return _parse(lines, self.options, diagnostics)
+
+            section.merge_into(tree)
+            parsed.append((start, section))
+
+        self._sections = sections
+        for start, section in parsed:
+            for diag_type, line_no, line, error in section.diagnostics:
+                diagnostics.add(diag_type, start + line_no, line, error)
+
+        return tree, diagnostics
+
+
+class _Section:
+    def __init__(self, lines: list[str], options: ParserOptions) -> None:
+        recorder = _DiagnosticsRecorder()
+        self.tree: dict[str, Any] = _parse_lines(lines, options, recorder)
+        # (type, line number in the section, line, error)
+        self.diagnostics: list[_DiagnosticRecord] = recorder.records
+        self.has_errors: bool = recorder.get_count(DiagnosticType.ERROR) > 0
+
+        # only branches of the top-level item the section starts with
+        value: Any = self.tree.get(_get_top_level_item(lines[0]))
+        self.is_mergeable: bool = not self.tree or (
+            len(self.tree) == 1
+            and (
+                isinstance(value, dict)
+                or (
+                    isinstance(value, list)
+                    and bool(value)
+                    and all(isinstance(item, dict) for item in value)
+                )
+            )
         )
 
-    def is_top(self) -> bool:
-        return self.offset == 0
+    # Adds the section to the tree like _parse_lines() adds top-level branches:
+    # a repeated item becomes a list, which is moved to the end of the tree
+    # when it's created. Lists are copied, the section is reused as is.
+    def merge_into(self, tree: dict[str, Any]) -> None:
+        if not tree:
+            for key, value in self.tree.items():
+                tree[key] = list(value) if isinstance(value, list) else value
+            return
+
+        for key, value in self.tree.items():
+            for branch in value if isinstance(value, list) else [value]:
+                if key not in tree:
+                    tree[key] = branch
+                elif isinstance(tree[key], list):
+                    tree[key].append(branch)
+                else:
+                    existing_node: Any = tree.pop(key)
+                    tree[key] = [existing_node, branch]
+
+
+# (type, line number, line, error), the arguments of Diagnostics.add()
+_DiagnosticRecord = tuple[DiagnosticType, int, str, Exception | None]
+
+
+# keeps all diagnostics in order to add them to another collector later
+class _DiagnosticsRecorder(Diagnostics):
+    def __init__(self) -> None:
+        super().__init__(max_samples=0)
+        self.records: list[_DiagnosticRecord] = []
 
-    def is_pair(self) -> bool:
-        return self.left is not None and self.right is not None
+    def add(
+        self,
+        diag_type: DiagnosticType,
+        line_no: int,
+        line: str,
+        error: Exception | None = None,
+    ) -> None:
+        super().add(diag_type, line_no, line, error)
+        self.records.append((diag_type, line_no, line, error))
 
 
 class _LineType(Enum):
@@ -196,154 +376,320 @@ class _LineType(Enum):
     LIST_VALUE = 2
 
 
-def _get_line_offset(line) -> tuple[str, int]:
-    tidy_line: str = line.lstrip(" ")
-    offset: int = len(line) - len(tidy_line)
-    return tidy_line, offset
+# (offset, left, right, line), offset is -1 for an empty line
+_Token = tuple[int, str | None, str | None, str]
+_EMPTY_TOKEN: _Token = (-1, None, None, "")
+_EOF_TOKEN: _Token = (0, None, None, "")
+_TOKEN_MEMO_SIZE: int = 65536
 
 
 ###############################################################################
 
 
-def _prepare(src: str) -> list[str]:
-    result: list[str] = []
-    lines: list[str] = src.splitlines()
-
-    skip_line: bool = False
-    for idx, line in enumerate(lines):
-        if not line:
+# Splits the incoming chunks exactly like str.splitlines() would split the whole
+# text. File objects yield lines with the line break included, while lists
+# (e.g. the result of splitlines()) may contain empty strings that must be kept.
+def _split_lines(source: Iterable[str]) -> Iterator[str]:
+    for chunk in source:
+        if chunk:
+            yield from chunk.splitlines()
+        else:
+            yield chunk
+
+
+# the first word of a line with zero offset
+def _get_top_level_item(line: str) -> str:
+    if "\t" in line:
+        line = line.replace("\t", "  ")
+    return line.split(" ", 1)[0].strip()
+
+
+# Yields (start, end) line ranges of the config sections. A section starts
+# with a top-level line (zero offset and a top-level item), unless the parser
+# would join or drop it, see the old config format support in _parse_lines().
+def _split_sections(
+    lines: list[str], top_level_items: frozenset[str]
+) -> Iterator[tuple[int, int]]:
+    start: int = 0
+
+    # most lines are indented, so the zero offset ones are filtered first
+    for idx in [
+        idx
+        for idx, line in enumerate(lines)
+        if line and line[0] != " " and line[0] != "\t" and idx > 0
+    ]:
+        line: str = lines[idx]
+        if _get_top_level_item(line) not in top_level_items:
             continue
 
-        if skip_line:
-            skip_line = False
+        # the blank line before is joined with the top-level line, and a single
+        # key followed by a blank line is dropped
+        prev_line: str = lines[idx - 1]
+        if prev_line and not prev_line.rstrip():
             continue
-
-        line = line.rstrip().replace("\t", "  ")
-
-        # support old config format:
-        #     key           <- if key value is string list, it starts from the new line
-        #             value1
-        #             value2
-        # ... we turn this into that if the value start position > key end position
-        #     key     value1
-        #             value2
-        # ... to distinguish string lists from nested objects
-        #     key          <- pray that the key has enough length
-        #       nested_key
-
-        tidy_line, offset = _get_line_offset(line)
-        parts: list[str] = tidy_line.split(" ", 1)
-
-        if len(parts) == 1 and idx < len(lines) - 1:
-            next_line: str = lines[idx + 1].rstrip().replace("\t", "  ")
-            if not next_line:
+        if len(line.rstrip().split(" ", 1)) == 1 and idx + 1 < len(lines):
+            if not lines[idx + 1].rstrip():
                 continue
 
-            prev_key_end: int = offset + len(parts[0])
-            next_tidy_line, next_offset = _get_line_offset(next_line)
-            next_parts: list[str] = next_tidy_line.split(" ", 1)
-            if len(next_parts) == 1 and next_offset >= prev_key_end:
-                result.append(line + next_line)
-                #print(f"join: {idx}, {line + next_line}")
-                skip_line = True
-                continue
-            else:
-                result.append(line)
+        yield (start, idx)
+        start = idx
+
+    if start < len(lines):
+        yield (start, len(lines))
+
+
+# Tokenizes and builds the tree in a single pass over the lines.
+#
+# Every line is normalized and split only once: the lookahead line of
+# the old-format join is reused when it becomes current, and since configs
+# repeat the same "key value" lines a lot, tokens of such lines (they don't
+# depend on the lookahead) are memoized in a bounded table.
+#
+# The structure of each line is decided by the offset of the line that
+# follows it, so a token is kept pending until the next one is known.
+# Open branches are kept in a stack that is popped on dedent.
+#
+# With options.intern, every key and value goes through a table of the
+# strings seen so far, so the tree holds a single object per distinct
+# string (configs repeat the same attribute names and a few values, like
+# "enabled", in every element). The tree is made of plain dicts either way.
+def _parse_lines(
+    lines: Iterable[str], options: ParserOptions, diagnostics: Diagnostics
+) -> dict[str, Any]:
+    BRANCH = _LineType.BRANCH
+    KEY_VALUE = _LineType.KEY_VALUE
+    LIST_VALUE = _LineType.LIST_VALUE
+
+    top_level_items: frozenset[str] = options.top_level_items
+    strings: dict[str, str] | None = {} if options.intern else None
 
-        else:
-            result.append(line)
-
-    return result
-
-
-def to_json(src: str) -> dict[str, Any]:
     tree: dict[str, Any] = {}
-    path: list = [(tree, -1)]
-    line: _CfgLine
-    line_type: _LineType = _LineType.UNKNOWN
+    path: list[tuple[dict[str, Any], int]] = [(tree, -1)]
+    is_path_sorted: bool = True
+    parent: dict[str, Any] = tree
     prev_type: _LineType = _LineType.UNKNOWN
-    next_offset: int = 0
     prev_offset: int = 0
     last_key = ""
+    # source line numbers of the current and the pending token
+    line_no: int = 0
+    token_line_no: int = 0
 
-    lines: list[str] = _prepare(src)
+    memo: dict[str, _Token] = {}
+    # normalized lookahead line: (line, tidy_line, offset, parts)
+    cached: tuple[str, str, int, list[str]] | None = None
+    skip_line: bool = False
 
-    top_level_items: set[str] = _TOP_LEVEL_CFG
-    try:
-        raw_items: str = get_config().get("top-level-items", "")
-        if raw_items:
-            top_level_items.update(item.strip() for item in raw_items.split(","))
-    except Exception:
-        pass
+    it: Iterator[str] = iter(lines)
+    next_raw: str | None = next(it, None)
+    token: _Token | None = None
+    next_token: _Token | None
+
+    while token is not _EOF_TOKEN:
+        # tokenize the next line
+
+        if next_raw is None:
+            # the end of input is seen as a line with zero offset
+            next_token = _EOF_TOKEN
+        else:
+            raw: str = next_raw
+            next_raw = next(it, None)
+            line_no += 1
+
+            if not raw:
+                continue
+
+            if skip_line:
+                skip_line = False
+                continue
+
+            next_token = None
+            if cached is not None:
+                line, tidy_line, offset, parts = cached
+                cached = None
+            else:
+                next_token = memo.get(raw)
+                if next_token is None:
+                    line = raw.rstrip()
+                    if "\t" in line:
+                        line = line.replace("\t", "  ")
+                    tidy_line = line.lstrip(" ")
+                    offset = len(line) - len(tidy_line)
+                    parts = tidy_line.split(" ", 1)
+
+            if next_token is not None:
+                pass
+            elif len(parts) == 2:
+                next_token = (offset, parts[0].strip(), parts[1].strip(), line)
+                if len(memo) >= _TOKEN_MEMO_SIZE:
+                    memo.clear()
+                memo[raw] = next_token
+            elif next_raw is None:
+                next_token = (
+                    (offset, parts[0].strip(), None, line) if line else _EMPTY_TOKEN
+                )
+            else:
+                # support old config format:
+                #     key           <- if key value is string list, it starts from the new line
+                #             value1
+                #             value2
+                # ... we turn this into that if the value start position > key end position
+                #     key     value1
+                #             value2
+                # ... to distinguish string lists from nested objects
+                #     key          <- pray that the key has enough length
+                #       nested_key
+
+                next_line: str = next_raw.rstrip()
+                if not next_line:
+                    continue
+                if "\t" in next_line:
+                    next_line = next_line.replace("\t", "  ")
+
+                next_tidy_line: str = next_line.lstrip(" ")
+                next_offset: int = len(next_line) - len(next_tidy_line)
+                next_parts: list[str] = next_tidy_line.split(" ", 1)
+
+                if len(next_parts) == 1 and next_offset >= offset + len(parts[0]):
+                    # same as splitting the joined line again
+                    if tidy_line:
+                        next_token = (
+                            offset,
+                            tidy_line.strip(),
+                            next_tidy_line.strip(),
+                            line + next_line,
+                        )
+                    else:
+                        next_token = (
+                            next_offset,
+                            next_tidy_line.strip(),
+                            None,
+                            next_line,
+                        )
+                    skip_line = True
+                else:
+                    next_token = (
+                        (offset, parts[0].strip(), None, line) if line else _EMPTY_TOKEN
+                    )
+                    cached = (next_line, next_tidy_line, next_offset, next_parts)
+
+        # add the pending line to the tree
+
+        pending: _Token | None = token
+        token = next_token
+        pending_line_no: int = token_line_no
+        token_line_no = line_no
+        if pending is None:
+            continue
 
-    for idx, raw_line in enumerate(lines):
-        line = _CfgLine(raw_line, top_level_items)
-        line_type = _LineType.UNKNOWN
+        offset, left, right, raw_line = pending
 
-        next_offset = 0
-        if idx < len(lines) - 1:
-            _, next_offset = _get_line_offset(lines[idx + 1])
+        next_offset = next_token[0]
+        if next_offset < 0:
+            next_offset = 0
 
-        if line.is_garbage():
-            print(f"ignore line {idx}: '{raw_line}'")
+        if offset == -1 or (offset == 0 and left not in top_level_items):
+            diagnostics.add(DiagnosticType.IGNORED_LINE, pending_line_no, raw_line)
             continue
 
+        if strings is not None:
+            left = strings.setdefault(left, left)
+            if right is not None:
+                right = strings.setdefault(right, right)
+
         try:
-            if line.is_pair():
-                line_type = _LineType.KEY_VALUE
+            if right is not None:
+                line_type = KEY_VALUE
+                parent[left] = right
+                last_key = left
+            elif next_offset > offset:
+                line_type = BRANCH
+                branch = {}
+                if left in parent:
+                    existing_node = parent[left]
+                    if isinstance(existing_node, list):
+                        existing_node.append(branch)
+                    else:
+                        del parent[left]
+                        parent[left] = [existing_node, branch]
+                else:
+                    parent[left] = branch
+                if offset <= path[-1][1]:
+                    is_path_sorted = False
+                path.append((branch, offset))
+                parent = branch
+            elif (offset > prev_offset and prev_type is not BRANCH) or (
+                offset == prev_offset and prev_type is LIST_VALUE
+            ):
+                line_type = LIST_VALUE
+                existing_value = parent[last_key]
+                if isinstance(existing_value, list):
+                    existing_value.append(left)
+                else:
+                    del parent[last_key]
+                    parent[last_key] = [existing_value, left]
             else:
-                if next_offset <= line.offset:
-                    line_type = _LineType.KEY_VALUE  # empty value
-
-                    if (
-                        line.offset > prev_offset and prev_type != _LineType.BRANCH
-                    ) or (
-                        line.offset == prev_offset and prev_type == _LineType.LIST_VALUE
-                    ):
-                        line_type = _LineType.LIST_VALUE
+                line_type = KEY_VALUE  # empty value
+                parent[left] = None
+
+            if next_offset < offset:
+                if is_path_sorted:
+                    while path[-1][1] >= next_offset:
+                        path.pop()
                 else:
-                    line_type = _LineType.BRANCH
-
-            parent, _ = path[-1]
-
-            match line_type:
-                case _LineType.KEY_VALUE:
-                    parent[line.left] = line.right
-                case _LineType.BRANCH:
-                    branch = {}
-                    if line.left in parent:
-                        existing_node = parent[line.left]
-                        if isinstance(existing_node, list):
-                            existing_node.append(branch)
-                        else:
-                            del parent[line.left]
-                            parent[line.left] = [existing_node, branch]
-                    else:
-                        parent[line.left] = branch
-                    path.append((branch, line.offset))
-                case _LineType.LIST_VALUE:
-                    list_value = line.left
-                    existing_value = parent[last_key]
-                    if isinstance(existing_value, list):
-                        existing_value.append(list_value)
-                    else:
-                        del parent[last_key]
-                        parent[last_key] = [existing_value, list_value]
-                    pass
-                case _:
-                    print(f"unknown line type {idx}: '{raw_line}'")
-                    pass
-
-            if next_offset < line.offset:
-                path = [item for item in path if item[1] < next_offset]
-                pass
+                    path = [item for item in path if item[1] < next_offset]
+                    is_path_sorted = all(
+                        path[i][1] < path[i + 1][1] for i in range(len(path) - 1)
+                    )
+                parent = path[-1][0]
 
-            prev_offset = line.offset
+            prev_offset = offset
             prev_type = line_type
-            if line.is_pair():
-                last_key = line.left
-        except Exception:
-            print_exc()
-            print(f"error at line {idx}: '{raw_line}'")
+        except Exception as e:
+            diagnostics.add(DiagnosticType.ERROR, pending_line_no, raw_line, e)
 
     return tree
+
+
+# options from cfg.ini, loaded once per process
+@cache
+def get_default_options() -> ParserOptions:
+    try:
+        raw_items: str = get_config().get("top-level-items", "")
+    except Exception:
+        raw_items = ""
+
+    return ParserOptions(item.strip() for item in raw_items.split(",") if item.strip())
+
+
+# Parses config from any iterable of lines (a file object, sys.stdin, a list)
+# without reading the whole input into memory. Besides the resulting tree,
+# only the current and the next line and the memo of the tokens of repeated
+# lines are kept. The memo is cleared once it has _TOKEN_MEMO_SIZE lines, so
+# its memory doesn't grow with the input (about 15 MB with 50-char lines).
+def parse(
+    source: Iterable[str],
+    options: ParserOptions | None = None,
+    diagnostics: Diagnostics | None = None,
+) -> tuple[dict[str, Any], Diagnostics]:
+    return _parse(_split_lines(source), options, diagnostics)
+
+
+def parse_stream(
+    source: Iterable[str], options: ParserOptions | None = None
+) -> dict[str, Any]:
+    return parse(source, options)[0]
+
+
+def to_json(src: str) -> dict[str, Any]:
+    return _parse(src.splitlines())[0]
+
+
+def _parse(
+    lines: Iterable[str],
+    options: ParserOptions | None = None,
+    diagnostics: Diagnostics | None = None,
+) -> tuple[dict[str, Any], Diagnostics]:
+    options = options or get_default_options()
+    if diagnostics is None:
+        diagnostics = options.create_diagnostics()
+    return _parse_lines(lines, options, diagnostics), diagnostics
@@ -0,0 +1,263 @@
+import json
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Any, BinaryIO, Iterable, Iterator
+
+import util as u
+from acme.context import get_element_key
+from acme.diff import PATH_SEPARATOR
+
+__all__ = ["ConfigIndex", "Hit", "PREFIX_WILDCARD", "index_values"]
+
+# a query ending with it matches the values that start with the rest
+PREFIX_WILDCARD: str = "*"
+
+# version of the saved index layout, see ConfigIndex.save()
+INDEX_FORMAT: int = 1
+_ARRAYS: list[str] = [
+    "element_sections",
+    "element_indices",
+    "location_elements",
+    "location_paths",
+    "offsets",
+    "postings",
+]
+_LISTS: list[str] = ["sections", "element_keys", "paths", "tokens"]
+
+
+# a value found in the config: the top-level element (section, index in the
+# section and its identity, see context.get_element_key()) and the path of the
+# attribute in the element
+class Hit:
+    __slots__ = ("value", "section", "index", "key", "path")
+
+    def __init__(
+        self, value: str, section: str, index: int, key: str, path: str
+    ) -> None:
+        self.value: str = value
+        self.section: str = section
+        self.index: int = index
+        self.key: str = key
+        self.path: str = path
+
+    # e.g. "realm-config[3] (core) > in-manipulationid: manip"
+    def __str__(self) -> str:
+        element: str = f"{self.section}[{self.index}]"
+        if self.key:
+            element += f" ({self.key})"
+        if self.path:
+            element += f"{PATH_SEPARATOR}{self.path}"
+        return f"{element}: {self.value}"
+
+
+# Inverted index of the config values: every string value (and each word of
+# a value with spaces) points to the attributes it's found in. Tokens are
+# kept sorted, so both exact and prefix lookups are binary searches. The
+# postings are flat arrays of integers rather than lists of objects, so the
+# index is small and fast to save and load, see convert.query_file().
+class ConfigIndex:
+    def __init__(self, json_cfg: dict[str, Any]) -> None:
+        # elements: section ID, index in the section and identity
+        self.sections: list[str] = []
+        self.element_sections: array[int] = array("I")
+        self.element_indices: array[int] = array("I")
+        self.element_keys: list[str] = []
+        # locations (attributes): element ID and path ID
+        self.paths: list[str] = []
+        self.location_elements: array[int] = array("I")
+        self.location_paths: array[int] = array("I")
+        # sorted tokens, the locations of the token i are
+        # postings[offsets[i]:offsets[i + 1]]
+        self.tokens: list[str] = []
+        self.offsets: array[int] = array("I", [0])
+        self.postings: array[int] = array("I")
+
+        path_ids: dict[str, int] = {}
+        token_locations: dict[str, list[int]] = {}
+
+        for section, value in json_cfg.items():
+            section_id: int = len(self.sections)
+            self.sections.append(section)
+
+            for idx, item in enumerate(value if u.is_list(value) else [value]):
+                element_id: int = len(self.element_keys)
+                self.element_sections.append(section_id)
+                self.element_indices.append(idx)
+                self.element_keys.append(
+                    get_element_key(section, item) if u.is_dict(item) else ""
+                )
+
+                for path, text in _iter_values(item, ""):
+                    path_id: int | None = path_ids.get(path)
+                    if path_id is None:
+                        path_id = path_ids[path] = len(self.paths)
+                        self.paths.append(path)
+
+                    location_id: int = len(self.location_paths)
+                    self.location_elements.append(element_id)
+                    self.location_paths.append(path_id)
+
+                    for token in _tokenize(text):
+                        locations: list[int] | None = token_locations.get(token)
+                        if locations is None:
+                            token_locations[token] = [location_id]
+                        elif locations[-1] != location_id:
+                            locations.append(location_id)
+
+        for token in sorted(token_locations):
+            self.tokens.append(token)
+            self.postings.extend(token_locations[token])
+            self.offsets.append(len(self.postings))
+
+    # Writes the index as a line of JSON (the given header, the strings and
+    # the array lengths) followed by the raw arrays. Unlike pickle, loading
+    # it can't run code, so the file may be kept in a shared directory.
+    def save(self, out: BinaryIO, header: list[Any]) -> None:
+        meta: dict[str, Any] = {
+            "format": INDEX_FORMAT,
+            "header": header,
+            "itemsize": array("I").itemsize,
+            "byteorder": sys.byteorder,
+            "arrays": {name: len(getattr(self, name)) for name in _ARRAYS},
+        }
+        for name in _LISTS:
+            meta[name] = getattr(self, name)
+
+        out.write(json.dumps(meta, separators=(",", ":")).encode())
+        out.write(b"\n")
+        for name in _ARRAYS:
+            getattr(self, name).tofile(out)
+
+    # reads the index written by save(), returns None if it was saved with
+    # another header or layout; raises ValueError or EOFError if it's corrupt
+    @classmethod
+    def load(cls, source: BinaryIO, header: list[Any]) -> "ConfigIndex | None":
+        meta: Any = json.loads(source.readline())
+        if (
+            not isinstance(meta, dict)
+            or meta.get("format") != INDEX_FORMAT
+            or meta.get("header") != header
+            or meta.get("itemsize") != array("I").itemsize
+            or meta.get("byteorder") != sys.byteorder
+        ):
+            return None
+
+        index: ConfigIndex = cls.__new__(cls)
+        for name in _LISTS:
+            values: Any = meta[name]
+            if not isinstance(values, list) or not all(
+                isinstance(value, str) for value in values
+            ):
+                raise ValueError(f"Invalid index list: {name}")
+            setattr(index, name, values)
+
+        for name in _ARRAYS:
+            values = array("I")
+            values.fromfile(source, int(meta["arrays"][name]))
+            setattr(index, name, values)
+
+        return index
+
+    # returns the attributes with the value (or a word of it), a query ending
+    # with PREFIX_WILDCARD matches all values starting with the rest of it;
+    # at most limit hits are returned if it's set
+    def find(self, query: str, limit: int | None = None) -> list[Hit]:
+        hits: list[Hit] = []
+        for token_id in self._find_tokens(query):
+            token: str = self.tokens[token_id]
+            for pos in range(self.offsets[token_id], self.offsets[token_id + 1]):
+                if limit is not None and len(hits) >= limit:
+                    return hits
+                hits.append(self._get_hit(token, self.postings[pos]))
+        return hits
+
+    def _find_tokens(self, query: str) -> Iterator[int]:
+        is_prefix: bool = query.endswith(PREFIX_WILDCARD)
+        prefix: str = query[: -len(PREFIX_WILDCARD)] if is_prefix else query
+
+        token_id: int = bisect_left(self.tokens, prefix)
+        while token_id < len(self.tokens):
+            token: str = self.tokens[token_id]
+            if token != prefix and not (is_prefix and token.startswith(prefix)):
+                return
+            yield token_id
+            token_id += 1
+
+    def _get_hit(self, token: str, location_id: int) -> Hit:
+        element_id: int = self.location_elements[location_id]
+        return Hit(
+            token,
+            self.sections[self.element_sections[element_id]],
+            self.element_indices[element_id],
+            self.element_keys[element_id],
+            self.paths[self.location_paths[location_id]],
+        )
+
+
+# Returns the sorted tokens of the values (as indexed by ConfigIndex) and, for
+# each token, the positions of the values that contain it. Only the tokens
+# are collected, so it's cheaper than ConfigIndex when the attribute paths
+# aren't needed (e.g. for the search in the HTML page). The strings are
+# collected as they are and only the distinct ones are split into words.
+def index_values(values: Iterable[Any]) -> tuple[list[str], list[list[int]]]:
+    string_values: dict[str, list[int]] = {}
+
+    for pos, value in enumerate(values):
+        nodes: list[Any] = [value]
+        while nodes:
+            node: Any = nodes.pop()
+            if isinstance(node, str):
+                positions: list[int] | None = string_values.get(node)
+                if positions is None:
+                    string_values[node] = [pos]
+                elif positions[-1] != pos:
+                    positions.append(pos)
+            elif isinstance(node, dict):
+                nodes.extend(node.values())
+            elif isinstance(node, list):
+                nodes.extend(node)
+
+    # token -> positions of each string value that has it
+    token_values: dict[str, list[list[int]]] = {}
+    for text, positions in string_values.items():
+        for token in _tokenize(text):
+            token_values.setdefault(token, []).append(positions)
+
+    tokens: list[str] = sorted(token_values)
+    return tokens, [
+        (
+            token_values[token][0]
+            if len(token_values[token]) == 1
+            else sorted(set().union(*token_values[token]))
+        )
+        for token in tokens
+    ]
+
+
+###############################################################################
+
+
+# yields (path, value) of the string values of the element, the paths are
+# formatted like in diff._diff_values()
+def _iter_values(value: Any, path: str) -> Iterator[tuple[str, str]]:
+    if u.is_string(value):
+        yield (path, value)
+    elif u.is_dict(value):
+        for key, item in value.items():
+            yield from _iter_values(
+                item, f"{path}{PATH_SEPARATOR}{key}" if path else key
+            )
+    elif u.is_string_list(value):
+        for item in value:
+            yield (path, item)
+    elif u.is_list(value):
+        for idx, item in enumerate(value):
+            yield from _iter_values(item, f"{path}[{idx}]")
+
+
+def _tokenize(text: str) -> list[str]:
+    words: list[str] = text.split()
+    if len(words) > 1:
+        return [text, *words]
+    return words
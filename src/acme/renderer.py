@@ -1,208 +1,677 @@
+import json
+import os
 from base64 import b64encode
+from functools import cache, partial
+from itertools import groupby, islice
+from operator import itemgetter
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator, TextIO
 
 import util as u
-from acme.context import ConfigElement, Context
-from env import MEIPASS_DIR
-from jinja2 import Environment, FileSystemLoader, Template
-
-__all__ = ["render"]
+from acme.context import ConfigElement, Context, get_element_key
+from acme.diff import ChangeType, ElementChange
+from acme.query import index_values
+from env import CACHE_DIR, MEIPASS_DIR
+from jinja2 import (
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    ModuleLoader,
+    Template,
+)
+from jinja2.bccache import Bucket
+
+__all__ = [
+    "compile_templates",
+    "render",
+    "render_diff_to",
+    "render_to",
+    "TextCache",
+    "warm_up",
+    "write_assets",
+]
 
 ASSETS_DIR: Path = MEIPASS_DIR / "acme/assets"
-ENV: Environment = Environment(loader=FileSystemLoader(ASSETS_DIR))
+COMPILED_DIR: Path = MEIPASS_DIR / "acme/templates"
+TEMPLATES: list[str] = ["index.html", "tree.html", "diff.html"]
+ASSETS_URL: str = "assets"
+STATIC_FILES: list[str] = ["main.css", "main.js", "FiraMono.ttf"]
 TAB_SIZE: int = 8
 KEY_PAD_SIZE = 48
+STREAM_BUFFER_SIZE: int = 256
+# number of list items in a lazily materialised section
+LAZY_CHUNK_SIZE: int = 100
+REALM_CLASS_PREFIX: str = "realm-"
+CHANGE_TYPES: list[str] = [change_type.value for change_type in ChangeType]
+
+
+# Compiled templates are cached in the user cache dir, so only the first
+# process pays for the compilation. The bundled app ships templates
+# precompiled at build time instead (see compile_templates()), because
+# its temp dir, and so the cache key, changes on every launch.
+class _BytecodeCache(FileSystemBytecodeCache):
+    def dump_bytecode(self, bucket: Bucket) -> None:
+        # a failed dump only means that the next process compiles the template
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            super().dump_bytecode(bucket)
+        except OSError:
+            pass
+
+
+def _create_env() -> Environment:
+    if COMPILED_DIR.is_dir():
+        return Environment(loader=ModuleLoader(COMPILED_DIR))
+
+    return Environment(
+        loader=FileSystemLoader(ASSETS_DIR),
+        bytecode_cache=_BytecodeCache(str(CACHE_DIR / "jinja")),
+    )
 
 
-def render(json_cfg: dict[str, Any], file_name: str = "sbc-html-config") -> str:
-    ENV.filters.update(
-        {
-            "is_dict": u.is_dict,
-            "is_list": u.is_list,
-            "tree_item_name": _get_tree_item_name,
-            "realm_ids": _get_realm_ids_or_empty,
+ENV: Environment = _create_env()
+
+# attributes rendered as links to the referenced element
+LINK_TARGETS: dict[str, ConfigElement] = {
+    "codec-policy": ConfigElement.CODEC_POLICY,
+    "network-interfaces": ConfigElement.NETWORK_INTERFACE,
+    "realm": ConfigElement.REALM,
+    "realm-id": ConfigElement.REALM,
+    "egress-realm-id": ConfigElement.REALM,
+    "source-realm": ConfigElement.REALM,
+    "source-realms": ConfigElement.REALM,
+    "destination-realms": ConfigElement.REALM,
+    "response-map": ConfigElement.RESPONSE_MAP,
+    "constraint-name": ConfigElement.SESSION_CONSTRAINTS,
+    "in-manipulationid": ConfigElement.SIP_MANIPULATION,
+    "out-manipulationid": ConfigElement.SIP_MANIPULATION,
+}
+
+
+# render metadata of a top-level element or of a top-level list item
+class _ElementMeta:
+    def __init__(self, anchor: str, realm_class: str, label: str) -> None:
+        self.anchor: str = anchor
+        self.realm_class: str = realm_class
+        self.label: str = label
+
+
+# Render metadata computed in one pass before rendering and shared by the text
+# view and the sidebar: anchors, realm class tokens and labels of the top-level
+# elements, and the anchors that link attribute values point to.
+#
+# Each realm is given a class token (REALM_CLASS_PREFIX + index), which is added
+# to every element associated with the realm. The realm filter in main.js then
+# only swaps a stylesheet that hides the elements without the selected token,
+# and shows the per-realm sidebar counts computed here.
+class _PageMeta:
+    def __init__(self, json_cfg: dict[str, Any], ctx: Context) -> None:
+        # realm ID -> class token, in the config order
+        self.realms: dict[str, str] = {}
+        for realm in u.ensure_list(json_cfg.get(ConfigElement.REALM.value, [])):
+            realm_id: Any = realm.get("identifier") if u.is_dict(realm) else None
+            if u.is_string(realm_id) and realm_id not in self.realms:
+                self.realms[realm_id] = f"{REALM_CLASS_PREFIX}{len(self.realms)}"
+
+        self.elements: dict[str, list[_ElementMeta]] = {}
+        # tokens of the realms of any element in the section
+        self.section_realms: dict[str, str] = {}
+        # number of elements in the section per realm token
+        self.realm_counts: dict[str, dict[str, int]] = {}
+
+        for name, value in json_cfg.items():
+            if u.is_list(value):
+                elements: list[_ElementMeta] = [
+                    _ElementMeta(
+                        f"{name}_{idx}",
+                        self._get_realm_class(item, name, ctx),
+                        _get_tree_item_name(item, name, idx),
+                    )
+                    for idx, item in enumerate(value)
+                ]
+            else:
+                elements = [
+                    _ElementMeta(name, self._get_realm_class(value, name, ctx), name)
+                ]
+
+            counts: dict[str, int] = {}
+            for element in elements:
+                for token in element.realm_class.split():
+                    counts[token] = counts.get(token, 0) + 1
+
+            self.elements[name] = elements
+            self.realm_counts[name] = counts
+            self.section_realms[name] = " ".join(counts)
+
+        # see .scroll-marker#id (the section is a dict or a list)
+        anchors: dict[ConfigElement, dict[str, str]] = {}
+        for element, registry in ctx.index_registry.items():
+            is_list: bool = ctx.section_sizes.get(element, 0) > 1
+            anchors[element] = {
+                key: f"{element.value}_{idx}" if is_list else element.value
+                for key, idx in registry.items()
+            }
+
+        # attribute name -> value -> anchor
+        self.links: dict[str, dict[str, str]] = {
+            param_name: anchors.get(element, {})
+            for param_name, element in LINK_TARGETS.items()
         }
-    )
-
-    ctx: Context = Context(json_cfg)
 
+    # returns the class tokens of the element realms, the realms that aren't
+    # defined in the config can't be selected and are skipped
+    def _get_realm_class(self, value: Any, param_name: str, ctx: Context) -> str:
+        realm_ids: str = _get_realm_ids_or_empty(value, param_name, ctx)
+        if not realm_ids:
+            return ""
+
+        tokens: dict[str, None] = {}
+        for realm_id in realm_ids.split():
+            token: str | None = self.realms.get(realm_id)
+            if token:
+                tokens[token] = None
+        return " ".join(tokens)
+
+
+# Text view of the top-level elements kept between renders of a config that is
+# parsed again with acme.parser.SectionCache, which reuses the subtrees of the
+# unchanged sections. The text of an element is reused if the element is the
+# same object and the links it may contain point to the same anchors, so only
+# the changed sections (and those that link to the moved elements) are written.
+class TextCache:
+    def __init__(self) -> None:
+        self._texts: dict[int, _CachedText] = {}
+        self._used: dict[int, _CachedText] = {}
+        self._links: dict[str, dict[str, str]] = {}
+        # link attributes whose anchors have changed since the previous render
+        self._changed: set[str] = set()
+
+    # called before the text of the first element is requested
+    def start(self, links: dict[str, dict[str, str]]) -> None:
+        self._changed = {
+            param_name
+            for param_name, targets in links.items()
+            if targets != self._links.get(param_name)
+        }
+        self._links = links
+        self._used = {}
+
+    def get_text(
+        self,
+        name: str,
+        value: Any,
+        is_list_item: bool,
+        links: dict[str, dict[str, str]],
+    ) -> str:
+        cached: _CachedText | None = self._texts.get(id(value))
+        if (
+            cached is None
+            or cached.value is not value
+            or cached.name != name
+            or cached.is_list_item != is_list_item
+            or (self._changed and self._has_changed_links(cached, name))
+        ):
+            out: list[str] = []
+            if is_list_item:
+                _write_block(out, name, value, 0, False, links)
+            else:
+                _write_node(out, name, value, 0, False, links)
+            cached = _CachedText(name, value, is_list_item, "".join(out))
+
+        self._used[id(value)] = cached
+        return cached.text
+
+    # drops the text of the elements that are no longer in the config
+    def finish(self) -> None:
+        self._texts = self._used
+        self._used = {}
+
+    def _has_changed_links(self, cached: "_CachedText", name: str) -> bool:
+        if cached.link_params is None:
+            cached.link_params = _get_link_params(name, cached.value)
+        return not cached.link_params.isdisjoint(self._changed)
+
+
+class _CachedText:
+    __slots__ = ("name", "value", "is_list_item", "text", "link_params")
+
+    def __init__(self, name: str, value: Any, is_list_item: bool, text: str) -> None:
+        self.name: str = name
+        # keeps the element alive, so that its id isn't reused
+        self.value: Any = value
+        self.is_list_item: bool = is_list_item
+        self.text: str = text
+        # attributes of the element that may be rendered as links
+        self.link_params: frozenset[str] | None = None
+
+
+# Renders HTML page. By default, CSS, JS and the font are inlined, so that
+# the page is self-contained. If assets_url is set, the page references them
+# relative to that URL instead (see write_assets()). With lazy, the text view
+# of huge configs is only materialised in the browser as it's scrolled to.
+# The text cache keeps the text view between renders of the same config.
+def render(
+    json_cfg: dict[str, Any],
+    file_name: str = "sbc-html-config",
+    assets_url: str | None = None,
+    lazy: bool = False,
+    text_cache: "TextCache | None" = None,
+) -> str:
     template: Template = ENV.get_template("index.html")
     output: str = template.render(
-        file_name=file_name,
-        cfg=json_cfg,
-        cfg_text=_to_text_config(json_cfg, ctx),
-        ctx=ctx,
-        css_content=_load_css(),
-        js_content=_load_js(),
-        font=_load_font(),
+        _get_page_vars(json_cfg, file_name, assets_url, lazy, text_cache)
     )
 
     return output
 
 
+# Same as render(), but writes the page to the given file chunk by chunk as it's
+# produced, so the whole document is never held in memory.
+def render_to(
+    out: TextIO,
+    json_cfg: dict[str, Any],
+    file_name: str = "sbc-html-config",
+    assets_url: str | None = None,
+    lazy: bool = False,
+    text_cache: "TextCache | None" = None,
+) -> None:
+    template: Template = ENV.get_template("index.html")
+    stream = template.stream(
+        _get_page_vars(json_cfg, file_name, assets_url, lazy, text_cache)
+    )
+    stream.enable_buffering(STREAM_BUFFER_SIZE)
+    stream.dump(out)
+
+
+# Writes the report of the changes between two configs (see acme.diff) to the
+# given file chunk by chunk. The page is self-contained, like render() output.
+def render_diff_to(
+    out: TextIO,
+    changes: list[ElementChange],
+    old_name: str,
+    new_name: str,
+) -> None:
+    # section -> change type -> count
+    summary: dict[str, dict[str, int]] = {}
+    for change in changes:
+        counts = summary.setdefault(change.section, dict.fromkeys(CHANGE_TYPES, 0))
+        counts[change.type.value] += 1
+
+    template: Template = ENV.get_template("diff.html")
+    stream = template.stream(
+        {
+            "old_name": old_name,
+            "new_name": new_name,
+            "changes": changes,
+            "summary": summary,
+            "change_types": CHANGE_TYPES,
+            "element_text": _to_element_text,
+            "css_content": _load_css(),
+            "font": _load_font(),
+        }
+    )
+    stream.enable_buffering(STREAM_BUFFER_SIZE)
+    stream.dump(out)
+
+
+# Copies CSS, JS and the font into dest_dir / ASSETS_URL to share them between
+# the pages rendered with assets_url=ASSETS_URL. Existing files are only
+# rewritten if their content differs.
+def write_assets(dest_dir: Path) -> Path:
+    assets_dir: Path = dest_dir / ASSETS_URL
+    assets_dir.mkdir(parents=True, exist_ok=True)
+
+    for name in STATIC_FILES:
+        content: bytes = _load_static(name)
+        dest_file: Path = assets_dir / name
+
+        if dest_file.is_file() and dest_file.stat().st_size == len(content):
+            if dest_file.read_bytes() == content:
+                continue
+
+        u.write_atomically(dest_file, lambda out: out.write(content), binary=True)
+
+    return assets_dir
+
+
+# compiles templates and loads static files in advance, e.g. in a worker
+# process or a long-running watcher
+def warm_up() -> None:
+    for name in TEMPLATES:
+        ENV.get_template(name)
+
+    _load_css()
+    _load_js()
+    _load_font()
+
+
+# Compiles templates into Python modules that are loaded instead of
+# the template sources if they're placed into COMPILED_DIR.
+def compile_templates(dest_dir: Path) -> None:
+    env: Environment = Environment(loader=FileSystemLoader(ASSETS_DIR))
+    env.filters.update(ENV.filters)
+    env.compile_templates(
+        str(dest_dir), filter_func=lambda name: name in TEMPLATES, zip=None
+    )
+
+
 def _to_text_config(json_cfg: dict[str, Any], ctx: Context) -> str:
-    buffer: list[str] = []
+    return "".join(_iter_text_config(json_cfg, _PageMeta(json_cfg, ctx)))
+
+
+# yields the text view one top-level element (or list item) at a time
+def _iter_text_config(
+    json_cfg: dict[str, Any],
+    meta: "_PageMeta",
+    text_cache: "TextCache | None" = None,
+) -> Iterator[str]:
+    for _, _, text in _iter_text_elements(json_cfg, meta, text_cache):
+        yield text
+
+
+# Same as _iter_text_config(), but list items are grouped by LAZY_CHUNK_SIZE
+# into inert <template> placeholders, which main.js materialises when they're
+# scrolled or navigated to. The placeholder is sized by its line count, so the
+# scrollbar matches the full page, and keeps the range of items it contains,
+# so anchors like "#local-policy_123" can be resolved before they exist.
+# The placeholder has the realm class tokens of all its elements, so that the
+# realm filter hides it (and keeps the page height right) like the elements.
+# The sections that aren't elements (e.g. a single value) are never hidden by
+# the filter and are small, so they're written as is.
+def _iter_lazy_text_config(
+    json_cfg: dict[str, Any],
+    meta: "_PageMeta",
+    text_cache: "TextCache | None" = None,
+) -> Iterator[str]:
+    elements = _iter_text_elements(json_cfg, meta, text_cache)
+    for name, group in groupby(elements, itemgetter(0)):
+        items: Iterator[tuple[str, str | None, str]] = iter(group)
+        start: int = 0
+        while chunk := list(islice(items, LAZY_CHUNK_SIZE)):
+            if chunk[0][1] is None:
+                yield from (text for _, _, text in chunk)
+                continue
+
+            lines: int = sum(text.count("\n") for _, _, text in chunk)
+            classes: dict[str, None] = {"lazy": None}
+            for _, realm_class, _ in chunk:
+                classes.update(dict.fromkeys((realm_class or "").split()))
+            class_name: str = " ".join(classes)
+
+            yield (
+                f'<span class="{class_name}" data-section="{name}" '
+                f'data-from="{start}" data-to="{start + len(chunk) - 1}" '
+                f'style="--lines: {lines}"><template>'
+            )
+            yield from (text for _, _, text in chunk)
+            yield "</template></span>"
+            start += len(chunk)
+
+
+# yields (section name, realm class tokens, text) of each top-level element or
+# list item, the tokens are None if the text isn't an element (<code>)
+def _iter_text_elements(
+    json_cfg: dict[str, Any],
+    meta: "_PageMeta",
+    text_cache: "TextCache | None" = None,
+) -> Iterator[tuple[str, str | None, str]]:
+    links: dict[str, dict[str, str]] = meta.links
+    if text_cache is not None:
+        text_cache.start(links)
+
+    for name, value in json_cfg.items():
+        elements: list[_ElementMeta] = meta.elements[name]
+        out: list[str]
+
+        if u.is_list(value) and not u.is_string_list(value):
+            for item, element in zip(value, elements):
+                out = [
+                    _code_tag(element),
+                    f'<div id="{element.anchor}" class="scroll-marker"></div><b>{name}</b>\n',
+                ]
+                if text_cache is None:
+                    _write_block(out, name, item, 0, False, links)
+                else:
+                    out.append(text_cache.get_text(name, item, True, links))
+                out.append("</code>")
+                yield (name, element.realm_class, "".join(out))
+        elif u.is_dict(value):
+            element = elements[0]
+            out = [
+                _code_tag(element),
+                f'<div id="{element.anchor}" class="scroll-marker"></div><b>{name}</b>\n',
+            ]
+            if text_cache is None:
+                _write_node(out, name, value, 0, False, links)
+            else:
+                out.append(text_cache.get_text(name, value, False, links))
+            out.append("</code>")
+            yield (name, element.realm_class, "".join(out))
+        else:
+            out = []
+            _write_block(out, name, value, 0, True, links)
+            yield (name, None, "".join(out))
+
+    if text_cache is not None:
+        text_cache.finish()
+
+
+# Search index embedded into the page as JSON: the anchors and realm class
+# tokens of the top-level elements, the sorted value tokens (see
+# acme.query.index_values()) and, for each token, the elements that have it.
+# main.js looks the tokens up by binary search, so the page is never scanned.
+def _get_search_index(json_cfg: dict[str, Any], meta: "_PageMeta") -> str:
+    anchors: list[str] = []
+    realms: list[str] = []
+    values: list[Any] = []
 
+    # only the elements that have an anchor in the text view
     for name, value in json_cfg.items():
-        buffer.append(_to_text_node(name, value, 0, True, ctx))
+        if u.is_list(value) and not u.is_string_list(value):
+            items: Iterator[tuple[Any, _ElementMeta]] = zip(value, meta.elements[name])
+        elif u.is_dict(value):
+            items = iter([(value, meta.elements[name][0])])
+        else:
+            continue
+
+        for item, element in items:
+            anchors.append(element.anchor)
+            realms.append(element.realm_class)
+            values.append(item)
 
-    return _join_code_tags(buffer)
+    tokens, elements = index_values(values)
+    index: str = json.dumps(
+        {"anchors": anchors, "realms": realms, "tokens": tokens, "elements": elements},
+        separators=(",", ":"),
+    )
+    # the JSON is the content of a <script> element, which "</script>" would end
+    return index.replace("<", "\\u003c")
+
+
+# attributes of the element (at any depth) that may be rendered as links
+def _get_link_params(name: str, value: Any) -> frozenset[str]:
+    params: set[str] = {name} if name in LINK_TARGETS else set()
+    nodes: list[Any] = [value]
+
+    while nodes:
+        node: Any = nodes.pop()
+        if u.is_dict(node):
+            for key, val in node.items():
+                if key in LINK_TARGETS:
+                    params.add(key)
+                if not u.is_string(val):
+                    nodes.append(val)
+        elif u.is_list(node):
+            nodes.extend(item for item in node if not u.is_string(item))
+
+    return frozenset(params)
+
+
+# text of an added or removed element in the diff report, without links
+def _to_element_text(name: str, value: Any) -> str:
+    out: list[str] = []
+    if u.is_dict(value):
+        _write_node(out, name, value, 0, False, {})
+    else:
+        _write_block(out, name, value, 0, True, {})
+    return "".join(out)
+
+
+def _get_page_vars(
+    json_cfg: dict[str, Any],
+    file_name: str,
+    assets_url: str | None,
+    lazy: bool = False,
+    text_cache: "TextCache | None" = None,
+) -> dict[str, Any]:
+    ctx: Context = Context(json_cfg)
+    meta: _PageMeta = _PageMeta(json_cfg, ctx)
+
+    return {
+        "file_name": file_name,
+        "cfg": json_cfg,
+        "cfg_text": (
+            _iter_lazy_text_config(json_cfg, meta, text_cache)
+            if lazy
+            else _iter_text_config(json_cfg, meta, text_cache)
+        ),
+        "ctx": ctx,
+        "meta": meta,
+        # built when the template gets to it, after the config view
+        "search_index": partial(_get_search_index, json_cfg, meta),
+        "assets_url": assets_url,
+        "css_content": _load_css() if not assets_url else "",
+        "js_content": _load_js() if not assets_url else "",
+        "font": _load_font() if not assets_url else "",
+    }
+
+
+# static files are loaded (and the font is encoded) once per process
+@cache
+def _load_static(name: str) -> bytes:
+    with open(ASSETS_DIR / "static" / name, "rb") as f:
+        return f.read()
 
 
+@cache
 def _load_css() -> str:
     with open(ASSETS_DIR / "static/main.css", "r") as f:
         return f.read()
 
 
+@cache
 def _load_js() -> str:
     with open(ASSETS_DIR / "static/main.js", "r") as f:
         return f.read()
 
 
+@cache
 def _load_font() -> str:
-    with open(ASSETS_DIR / "static/FiraMono.ttf", "rb") as f:
-        return b64encode(f.read()).decode("ascii")
+    return b64encode(_load_static("FiraMono.ttf")).decode("ascii")
 
 
 ###############################################################################
 
 
-def _to_text_node(
-    node_name: str, node_value: Any, depth: int, is_print_name: bool, ctx: Context
-) -> str:
-    buffer: list[str] = []
+def _code_tag(element: _ElementMeta) -> str:
+    return f'<code class="{element.realm_class}">' if element.realm_class else "<code>"
+
+
+# Since we are using <pre>, each line of the text view ends with a newline
+# character, while <code> tags are written as is. Lines are appended exactly
+# once to the shared output list, so the time is linear in the output size
+# regardless of the nesting depth.
+def _write_node(
+    out: list[str],
+    node_name: str,
+    node_value: Any,
+    depth: int,
+    is_print_name: bool,
+    links: dict[str, dict[str, str]],
+) -> None:
     indent: int = depth * TAB_SIZE
 
     # list of any level or leaf value (string list)
     if u.is_list(node_value):
         if not u.is_string_list(node_value):
-            for idx, item in enumerate(node_value):
-                name = node_name
-                if depth == 0:
-                    buffer.append(
-                        f'<code data-realms="{_get_realm_ids_or_empty(item, node_name, ctx)}">'
-                    )
-                    name = f'<div id="{name}_{idx}" class="scroll-marker"></div><b>{name}</b>'
-
-                buffer.append(u.rpad(name, indent))
-                buffer.append(_to_text_node(node_name, item, depth, False, ctx))
-
-                if depth == 0:
-                    buffer.append("</code>")
+            for item in node_value:
+                out.append(u.rpad(node_name, indent).rstrip() + "\n")
+                _write_block(out, node_name, item, depth, False, links)
         else:
             for idx, s in enumerate(node_value):
                 if idx == 0:
-                    buffer.append(
-                        u.rpad(
-                            node_name.ljust(KEY_PAD_SIZE)
-                            + _wrap_to_link_if_needed(node_name, s, ctx),
-                            indent,
-                        )
+                    line = u.rpad(
+                        node_name.ljust(KEY_PAD_SIZE)
+                        + _wrap_to_link_if_needed(node_name, s, links),
+                        indent,
                     )
                 else:
-                    buffer.append(
-                        u.rpad(
-                            _wrap_to_link_if_needed(node_name, s, ctx),
-                            KEY_PAD_SIZE + indent,
-                        )
+                    line = u.rpad(
+                        _wrap_to_link_if_needed(node_name, s, links),
+                        KEY_PAD_SIZE + indent,
                     )
+                out.append(line.rstrip() + "\n")
     # dict of any level
     elif u.is_dict(node_value):
-        name = node_name
         if is_print_name:
-            if depth == 0:
-                buffer.append(
-                    f'<code data-realms="{_get_realm_ids_or_empty(node_value, node_name, ctx)}">'
-                )
-                name = f'<div id="{name}" class="scroll-marker"></div><b>{name}</b>'
-            buffer.append(u.rpad(name, indent))
-
-        for item in node_value.items():
-            buffer.append(_to_text_node(node_name, item, depth + 1, True, ctx))
-
-        if is_print_name and depth == 0:
-            buffer.append("</code>")
-    # dict value
-    elif u.is_tuple(node_value):
-        key, val = node_value
-        if val is None:
-            buffer.append(u.rpad(key.ljust(KEY_PAD_SIZE), indent))
-        elif u.is_string(val):
-            buffer.append(
-                u.rpad(
-                    key.ljust(KEY_PAD_SIZE) + _wrap_to_link_if_needed(key, val, ctx),
+            out.append(u.rpad(node_name, indent).rstrip() + "\n")
+
+        # dict values, a single line doesn't need to be written as a block
+        indent += TAB_SIZE
+        for key, val in node_value.items():
+            if val is None:
+                out.append(u.rpad(key, indent) + "\n")
+            elif u.is_string(val):
+                line = u.rpad(
+                    key.ljust(KEY_PAD_SIZE) + _wrap_to_link_if_needed(key, val, links),
                     indent,
                 )
-            )
-        else:
-            buffer.append(_to_text_node(key, val, depth, True, ctx))
-
-    return _join_code_tags(buffer)
-
-
+                out.append(line.rstrip() + "\n")
+            else:
+                _write_block(out, key, val, depth + 1, True, links)
+
+
+# Writes the node as a block: trailing blank lines of the block are dropped
+# and an empty block is written as a single blank line.
+def _write_block(
+    out: list[str],
+    node_name: str,
+    node_value: Any,
+    depth: int,
+    is_print_name: bool,
+    links: dict[str, dict[str, str]],
+) -> None:
+    start: int = len(out)
+    _write_node(out, node_name, node_value, depth, is_print_name, links)
+
+    end: int = len(out)
+    while end > start and out[end - 1] == "\n":
+        end -= 1
+
+    if end == start:
+        del out[start:]
+        out.append("\n")
+    elif end < len(out):
+        del out[end:]
+
+
+# the label is the element identity (see context.ELEMENT_KEYS), followed by
+# the details that tell the elements of some sections apart at a glance
 def _get_tree_item_name(value: dict[str, Any], param_name: str, idx: int) -> str:
-    result: str | None = None
+    result: str = get_element_key(param_name, value)
 
     match param_name:
-        case "access-control":
-            result = f'from {value.get("source-address")}'
-        case "codec-policy":
-            result = value.get("name")
-        case "host-route" | "host-routes":
-            result = f'to {value.get("dest-network")}'
         case "local-policy":
-            source_realm_raw: str | list[str] = value.get("source-realm", "*")
-            source_realm: str = (
-                f'({", ".join(source_realm_raw)})'
-                if u.is_list(source_realm_raw)
-                else str(source_realm_raw)
-            )
             next_hop: str = ";".join(Context.get_local_policy_next_hop(value))
-            result = f"from {source_realm} to {next_hop or '?'}"
+            if next_hop:
+                result = f"{result} to {next_hop}"
         case "network-interface":
-            result = Context.get_network_interface_id(value)
             if value.get("ip-address"):
                 result = result + " " + value.get("ip-address", "")
-        case "phy-interface":
-            result = value.get("name")
-        case "realm-config":
-            result = value.get("identifier")
-        case "response-map":
-            result = value.get("name")
-        case "session-agent":
-            result = value.get("hostname")
-        case "session-constraints":
-            result = value.get("name")
-        case "session-translation":
-            result = value.get("id")
-        case "sip-advanced-logging":
-            result = value.get("name")
-        case "sip-feature":
-            result = value.get("name")
-        case "session-group":
-            result = value.get("group-name")
         case "sip-interface":
-            result = value.get("realm-id", "")
             sip_port: str | None = Context.get_first_sip_port(value)
             if sip_port:
                 result = f"{result} [{sip_port}]"
-        case "sip-manipulation":
-            result = value.get("name")
-        case "snmp-community":
-            result = value.get("community-name")
-        case "steering-pool":
-            result = value.get("realm-id")
-        case "translation-rules":
-            result = value.get("id")
-        case "trap-receiver":
-            result = value.get("ip-address")
-
-    if not result and "id" in value:
-        result = value.get("id")
-
-    if not result and "name" in value:
-        result = value.get("name")
 
     return f"{str(idx)}: {result}" if result else str(idx)
 
@@ -243,48 +712,21 @@ def _get_realm_ids_or_empty(
     return ""
 
 
-def _wrap_to_link_if_needed(param_name: str, value: str, ctx: Context) -> str:
-    element_name: str = ""
-    pos: tuple[int, int] = (-1, -1)
-
-    match param_name:
-        case "codec-policy":
-            element_name = "codec-policy"
-            pos = ctx.get_element_pos(ConfigElement.CODEC_POLICY, value)
-        case "network-interfaces" | "network-interfaces":
-            element_name = "network-interface"
-            pos = ctx.get_element_pos(ConfigElement.NETWORK_INTERFACE, value)
-        case "realm" | "realm-id" | "egress-realm-id" | "source-realm":
-            element_name = "realm-config"
-            pos = ctx.get_element_pos(ConfigElement.REALM, value)
-        case "response-map":
-            element_name = "response-map"
-            pos = ctx.get_element_pos(ConfigElement.RESPONSE_MAP, value)
-        case "constraint-name":
-            element_name = "session-constraints"
-            pos = ctx.get_element_pos(ConfigElement.SESSION_CONSTRAINTS, value)
-        case "in-manipulationid" | "out-manipulationid":
-            element_name = "sip-manipulation"
-            pos = ctx.get_element_pos(ConfigElement.SIP_MANIPULATION, value)
-
-    if pos[0] < 0:
+def _wrap_to_link_if_needed(
+    param_name: str, value: str, links: dict[str, dict[str, str]]
+) -> str:
+    targets: dict[str, str] | None = links.get(param_name)
+    anchor: str | None = targets.get(value) if targets else None
+    if not anchor:
         return value
 
-    # see .scroll-marker#id (len == 1 -> dict, otherwise list)
-    href: str = element_name if pos[1] <= 1 else f"{element_name}_{str(pos[0])}"
-
-    return f'<a href="#{href}">{value}</a>'
+    return f'<a href="#{anchor}">{value}</a>'
 
 
-# Since we are using <pre>, the <code> tag isn't rendered and leaves
-# blank lines. This method inserts a newline character after any string
-# that isn't an opening or closing <code> tag.
-def _join_code_tags(list: list[str]) -> str:
-    result = []
-    for item in list:
-        if item.startswith("<code") or item.startswith("</code"):
-            result.append(item)
-        else:
-            result.append(item.rstrip() + "\n")
-
-    return "".join(result)
+# registered once the filter functions above are defined
+ENV.filters.update(
+    {
+        "is_dict": u.is_dict,
+        "is_list": u.is_list,
+    }
+)
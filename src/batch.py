@@ -0,0 +1,232 @@
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import acme.renderer as renderer
+from acme.parser import ParserOptions, get_default_options
+from cache import ConversionCache
+from convert import ConversionError, convert_file, convert_segment, export_file
+from split import ConfigSegment, find_configs
+
+SOURCE_PATTERNS: list[str] = ["*.txt", "*.log"]
+
+
+class BatchResult:
+    def __init__(self, source_file: Path) -> None:
+        self.source_file: Path = source_file
+        # number of the config in a session log, 0 if the file is a config
+        self.config: int = 0
+        self.dest_file: Path | None = None
+        self.error: str | None = None
+        # summary of parser diagnostics
+        self.diagnostics: str = ""
+        self.size: int = 0
+        self.elapsed: float = 0
+
+    def is_ok(self) -> bool:
+        return self.error is None
+
+
+# expands directories (*.txt, *.log files inside) and glob patterns
+def collect_files(paths: list[str]) -> list[Path]:
+    files: dict[Path, None] = {}
+
+    for path in paths:
+        if Path(path).is_dir():
+            for pattern in SOURCE_PATTERNS:
+                for file in sorted(Path(path).glob(pattern)):
+                    files[file] = None
+        elif Path(path).is_file():
+            files[Path(path)] = None
+        else:
+            for file in sorted(glob.glob(path, recursive=True)):
+                if Path(file).is_file():
+                    files[Path(file)] = None
+
+    return list(files.keys())
+
+
+def run_batch(
+    files: list[Path],
+    workers: int | None = None,
+    cache: ConversionCache | None = None,
+    shared_assets: bool = False,
+    options: ParserOptions | None = None,
+    lazy: bool = False,
+    format: str = "html",
+) -> list[BatchResult]:
+    workers = workers or os.cpu_count() or 1
+    results: list[BatchResult] = []
+    start: float = time.perf_counter()
+
+    if workers == 1:
+        _init_worker(cache)
+        for file in files:
+            results.append(
+                _report(_convert(file, shared_assets, options, lazy, format))
+            )
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(cache,)
+        ) as pool:
+            futures = [
+                pool.submit(_convert, file, shared_assets, options, lazy, format)
+                for file in files
+            ]
+            for future in as_completed(futures):
+                results.append(_report(future.result()))
+
+    _report_summary(results, time.perf_counter() - start)
+
+    return results
+
+
+# Converts every config found in the session logs (see split.find_configs())
+# into a separate HTML file. The logs are only scanned here, the configs are
+# read, parsed and rendered by the workers, so they're processed in parallel
+# even if they all come from a single log.
+def run_split(
+    files: list[Path],
+    workers: int | None = None,
+    shared_assets: bool = False,
+    options: ParserOptions | None = None,
+    lazy: bool = False,
+) -> list[BatchResult]:
+    workers = workers or os.cpu_count() or 1
+    results: list[BatchResult] = []
+    start: float = time.perf_counter()
+
+    jobs: list[tuple[Path, ConfigSegment, int]] = []
+    for file in files:
+        result = BatchResult(file)
+        try:
+            segments: list[ConfigSegment] = find_configs(file, options)
+            if not segments:
+                raise ConversionError("No configs found")
+        except Exception as e:
+            result.error = str(e)
+            results.append(_report(result))
+            continue
+
+        for number, segment in enumerate(segments, 1):
+            jobs.append((file, segment, number))
+
+    if workers == 1:
+        _init_worker()
+        for job in jobs:
+            results.append(
+                _report(_convert_segment(*job, shared_assets, options, lazy))
+            )
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [
+                pool.submit(_convert_segment, *job, shared_assets, options, lazy)
+                for job in jobs
+            ]
+            for future in as_completed(futures):
+                results.append(_report(future.result()))
+
+    _report_summary(results, time.perf_counter() - start)
+
+    return results
+
+
+###############################################################################
+
+
+# cache of the worker process, see _init_worker()
+_cache: ConversionCache | None = None
+
+
+# pays the template compilation once per worker process; the cache is passed
+# here rather than pickled into every task, so it keeps its running size
+# between the files and only scans the directory once the size is exceeded
+def _init_worker(cache: ConversionCache | None = None) -> None:
+    global _cache
+    _cache = cache
+    renderer.warm_up()
+
+
+def _convert(
+    source_file: Path,
+    shared_assets: bool,
+    options: ParserOptions | None,
+    lazy: bool,
+    format: str = "html",
+) -> BatchResult:
+    result = BatchResult(source_file)
+    start: float = time.perf_counter()
+    options = options or get_default_options()
+    diagnostics = options.create_diagnostics()
+
+    try:
+        result.size = source_file.stat().st_size
+        if format == "html":
+            result.dest_file = convert_file(
+                source_file, _cache, shared_assets, options, diagnostics, lazy
+            )
+        else:
+            result.dest_file = export_file(source_file, format, options, diagnostics)
+    except Exception as e:
+        result.error = str(e)
+
+    result.diagnostics = str(diagnostics)
+
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def _convert_segment(
+    source_file: Path,
+    segment: ConfigSegment,
+    number: int,
+    shared_assets: bool,
+    options: ParserOptions | None,
+    lazy: bool,
+) -> BatchResult:
+    result = BatchResult(source_file)
+    result.config = number
+    start: float = time.perf_counter()
+    options = options or get_default_options()
+    diagnostics = options.create_diagnostics()
+
+    try:
+        result.size = segment.end - segment.start
+        result.dest_file = convert_segment(
+            source_file, segment, number, shared_assets, options, diagnostics, lazy
+        )
+    except Exception as e:
+        result.error = str(e)
+
+    result.diagnostics = str(diagnostics)
+
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def _report(result: BatchResult) -> BatchResult:
+    source: str = str(result.source_file)
+    if result.config:
+        source += f" #{result.config}"
+
+    if result.is_ok():
+        details: str = f"{result.elapsed:.2f}s"
+        if result.diagnostics:
+            details += f", {result.diagnostics}"
+        print(f"ok      {source} -> {result.dest_file} ({details})")
+    else:
+        print(f"failed  {source}: {result.error}")
+    return result
+
+
+def _report_summary(results: list[BatchResult], elapsed: float) -> None:
+    succeeded: list[BatchResult] = [r for r in results if r.is_ok()]
+    size_mb: float = sum(r.size for r in succeeded) / 1024 / 1024
+
+    print(
+        f"{len(succeeded)} converted, {len(results) - len(succeeded)} failed"
+        f" in {elapsed:.2f}s ({len(succeeded) / elapsed if elapsed else 0:.1f} files/s,"
+        f" {size_mb / elapsed if elapsed else 0:.1f} MB/s)"
+    )
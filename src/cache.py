@@ -0,0 +1,129 @@
+import hashlib
+import os
+import pickle
+from pathlib import Path
+from typing import Any
+
+import env
+import util as u
+
+CHUNK_SIZE: int = 1024 * 1024
+DEFAULT_MAX_SIZE: int = 256 * 1024 * 1024
+
+
+# On-disk cache of parsed configs keyed by the hash of the source file content,
+# the tool version and the effective parser settings. Each entry stores
+# the parsed tree (pickled) and, for each output file, the hash of
+# the rendered HTML, so an unchanged input can skip parsing and rendering.
+class ConversionCache:
+    def __init__(
+        self, directory: Path | None = None, max_size: int = DEFAULT_MAX_SIZE
+    ) -> None:
+        self.directory: Path = directory or (env.CACHE_DIR / "configs")
+        self.max_size: int = max_size
+        self._size: int | None = None
+
+    def get_key(self, source_file: Path, options_id: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(f"{env.VERSION}\n{options_id}\n".encode())
+        with open(source_file, "rb") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def get_tree(self, key: str) -> dict[str, Any] | None:
+        try:
+            with open(self._tree_path(key), "rb") as f:
+                tree: dict[str, Any] = pickle.load(f)
+            self._touch(self._tree_path(key))
+            return tree
+        except Exception:
+            return None
+
+    def put_tree(self, key: str, tree: dict[str, Any]) -> None:
+        self._write(self._tree_path(key), pickle.dumps(tree, pickle.HIGHEST_PROTOCOL))
+
+    # variant distinguishes outputs rendered with different options
+    def get_html_hash(
+        self, key: str, dest_file: Path, variant: str | None = None
+    ) -> str | None:
+        try:
+            path: Path = self._html_path(key, dest_file, variant)
+            html_hash: str = path.read_text()
+            self._touch(path)
+            return html_hash
+        except Exception:
+            return None
+
+    def put_html_hash(
+        self, key: str, dest_file: Path, variant: str | None, html_hash: str
+    ) -> None:
+        self._write(self._html_path(key, dest_file, variant), html_hash.encode())
+
+    # removes least recently used entries until the cache is below 3/4 of
+    # the max size
+    def evict(self) -> None:
+        files: list[tuple[float, int, Path]] = []
+        for path in self.directory.glob("*/*"):
+            if path.suffix == ".tmp":
+                continue
+            try:
+                stat = path.stat()
+                files.append((stat.st_mtime, stat.st_size, path))
+            except OSError:
+                pass
+
+        self._size = sum(size for _, size, _ in files)
+        if self._size <= self.max_size:
+            return
+
+        for _, size, path in sorted(files, key=lambda item: item[0]):
+            if self._size <= self.max_size * 3 // 4:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            self._size -= size
+
+    ###########################################################################
+
+    def _tree_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.tree"
+
+    def _html_path(self, key: str, dest_file: Path, variant: str | None) -> Path:
+        dest_id: str = f"{dest_file.absolute()}\n{variant or ''}"
+        dest_hash: str = hashlib.sha256(dest_id.encode()).hexdigest()
+        return self.directory / key[:2] / f"{key}.{dest_hash[:16]}.out"
+
+    # the cache is an optimization, so write errors are ignored
+    def _write(self, path: Path, content: bytes) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            u.write_atomically(path, lambda f: f.write(content), binary=True)
+        except OSError:
+            return
+
+        if self._size is None:
+            self.evict()
+        else:
+            self._size += len(content)
+            if self._size > self.max_size:
+                self.evict()
+
+    def _touch(self, path: Path) -> None:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+
+def hash_text_file(file: Path) -> str | None:
+    digest = hashlib.sha256()
+    try:
+        with open(file, "r") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                digest.update(chunk.encode())
+    except Exception:
+        return None
+    return digest.hexdigest()
@@ -0,0 +1,256 @@
+import argparse
+import sys
+from multiprocessing import freeze_support
+from pathlib import Path
+
+from acme.parser import Diagnostics, ParserOptions, get_default_options
+from batch import collect_files, run_batch, run_split
+from cache import DEFAULT_MAX_SIZE, ConversionCache
+from convert import (
+    EXPORT_FORMATS,
+    ConversionError,
+    convert_file,
+    diff_files,
+    export_file,
+    query_file,
+)
+from watch import DEFAULT_INTERVAL, watch
+
+# Headless entry point. It must never import GUI modules (tkinter,
+# customtkinter, webbrowser), so that it starts fast and works without
+# a display. See tests/acme.py::test_cli_imports for the import-time budget.
+
+
+def create_arg_parser() -> argparse.ArgumentParser:
+    arg_parser = argparse.ArgumentParser(
+        prog="sbc-html-config",
+        description="Convert SBC config files to HTML.",
+    )
+    arg_parser.add_argument(
+        "paths",
+        nargs="*",
+        help="config file, or directories and glob patterns for batch mode",
+    )
+    arg_parser.add_argument(
+        "--format",
+        choices=["html", *EXPORT_FORMATS],
+        default="html",
+        help="output format: HTML page, parsed tree as JSON, or one JSON record"
+        " per top-level element (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--diff",
+        action="store_true",
+        help="compare two config files (old, new) and write an HTML report"
+        " of the changes",
+    )
+    arg_parser.add_argument(
+        "--query",
+        metavar="VALUE",
+        help="print the config elements and attributes that have the value"
+        " (or a word of it), 'VALUE*' matches the values starting with VALUE",
+    )
+    arg_parser.add_argument(
+        "--save-index",
+        action="store_true",
+        help="save the query index next to the config, so that the next queries"
+        " don't parse it again",
+    )
+    arg_parser.add_argument(
+        "--split",
+        action="store_true",
+        help="find every config in terminal session logs (e.g. several"
+        " 'show running-config' outputs) and convert each into its own file",
+    )
+    arg_parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep running and convert the files again when they change",
+    )
+    arg_parser.add_argument(
+        "--interval",
+        type=float,
+        default=DEFAULT_INTERVAL,
+        help="polling interval in seconds in watch mode (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=None,
+        help="number of worker processes in batch mode (default: CPU count)",
+    )
+    arg_parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="skip parsing and rendering of configs that haven't changed",
+    )
+    arg_parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_MAX_SIZE // 1024 // 1024,
+        help="max cache size in MB (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--shared-assets",
+        action="store_true",
+        help="write CSS/JS/font once into 'assets' dir instead of inlining them",
+    )
+    arg_parser.add_argument(
+        "--lazy",
+        action="store_true",
+        help="materialise the config view in the browser as it's scrolled to,"
+        " for huge configs",
+    )
+    arg_parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="print every ignored or failed config line",
+    )
+    return arg_parser
+
+
+# converts the files given in the parsed arguments, returns the exit code
+def run(args: argparse.Namespace) -> int:
+    if not args.paths:
+        print("No config files specified")
+        return 2
+
+    options = ParserOptions(get_default_options().top_level_items, args.verbose)
+    if args.diff:
+        return _run_diff(args.paths, options)
+    if args.query is not None:
+        return _run_query(args.paths, args.query, options, args.save_index)
+    if args.format != "html" and (args.watch or args.split):
+        print("Watch and split modes only support HTML output")
+        return 2
+
+    cache: ConversionCache | None = (
+        ConversionCache(max_size=args.cache_size * 1024 * 1024) if args.cache else None
+    )
+
+    if args.watch:
+        watch(args.paths, args.interval, cache, args.shared_assets, options, args.lazy)
+        return 0
+
+    if args.split:
+        return _run_split(args, options)
+
+    # single file
+    if len(args.paths) == 1 and Path(args.paths[0]).is_file():
+        diagnostics = options.create_diagnostics()
+        try:
+            if args.format == "html":
+                convert_file(
+                    Path(args.paths[0]),
+                    cache,
+                    args.shared_assets,
+                    options,
+                    diagnostics,
+                    args.lazy,
+                )
+            else:
+                export_file(Path(args.paths[0]), args.format, options, diagnostics)
+        except ConversionError as e:
+            print(e)
+            return 1
+        finally:
+            _print_diagnostics(diagnostics)
+        return 0
+
+    # batch mode
+    files: list[Path] = collect_files(args.paths)
+    if not files:
+        print(f"No config files found: {' '.join(args.paths)}")
+        return 1
+
+    results = run_batch(
+        files,
+        args.workers,
+        cache,
+        args.shared_assets,
+        options,
+        args.lazy,
+        args.format,
+    )
+    return 0 if all(result.is_ok() for result in results) else 1
+
+
+def _run_diff(paths: list[str], options: ParserOptions) -> int:
+    if len(paths) != 2:
+        print("Diff mode expects two config files: old and new")
+        return 2
+
+    files: list[Path] = [Path(path) for path in paths]
+    diagnostics: list[Diagnostics] = [options.create_diagnostics() for _ in files]
+    try:
+        print(diff_files(files[0], files[1], options, *diagnostics))
+    except ConversionError as e:
+        print(e)
+        return 1
+    finally:
+        # line numbers are only meaningful with the file name
+        for file, file_diagnostics in zip(files, diagnostics):
+            _print_diagnostics(file_diagnostics, f"{file}: ")
+    return 0
+
+
+def _run_query(
+    paths: list[str], query: str, options: ParserOptions, save_index: bool
+) -> int:
+    files: list[Path] = collect_files(paths)
+    if not files:
+        print(f"No config files found: {' '.join(paths)}")
+        return 1
+
+    failed: bool = False
+    for file in files:
+        # parser diagnostics would get in the way of the output, they're
+        # only printed with --verbose
+        try:
+            hits = query_file(file, query, options, save_index=save_index)
+        except ConversionError as e:
+            print(e)
+            failed = True
+            continue
+
+        # file names are only needed to tell the configs apart
+        prefix: str = f"{file}: " if len(files) > 1 else ""
+        for hit in hits:
+            print(f"{prefix}{hit}")
+
+    return 1 if failed else 0
+
+
+def _run_split(args: argparse.Namespace, options: ParserOptions) -> int:
+    files: list[Path] = collect_files(args.paths)
+    if not files:
+        print(f"No config files found: {' '.join(args.paths)}")
+        return 1
+
+    results = run_split(files, args.workers, args.shared_assets, options, args.lazy)
+    return 0 if all(result.is_ok() for result in results) else 1
+
+
+def _print_diagnostics(diagnostics: Diagnostics, prefix: str = "") -> None:
+    if not diagnostics:
+        return
+
+    print(f"{prefix}{diagnostics}")
+    for diag_type, samples in diagnostics.samples.items():
+        for line_no, message in samples:
+            print(f"  line {line_no}: {diag_type.value}: {message}")
+        if diagnostics.get_count(diag_type) > len(samples):
+            print(f"  ... {diagnostics.get_count(diag_type) - len(samples)} more")
+
+
+def main(argv: list[str] | None = None) -> int:
+    return run(create_arg_parser().parse_args(argv))
+
+
+###############################################################################
+
+if __name__ == "__main__":
+    freeze_support()
+    sys.exit(main())
@@ -0,0 +1,343 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import IO, Any, Callable, Iterable, TextIO
+
+import acme.export as export
+import acme.renderer as renderer
+import env
+import util as u
+from acme.diff import diff
+from acme.parser import (
+    Diagnostics,
+    ParserOptions,
+    SectionCache,
+    get_default_options,
+    parse,
+)
+from acme.query import ConfigIndex, Hit
+from cache import ConversionCache, hash_text_file
+from split import ConfigSegment
+
+
+class ConversionError(Exception):
+    pass
+
+
+# output formats besides HTML, the value is the file extension
+EXPORT_FORMATS: dict[str, str] = {"json": ".json", "ndjson": ".ndjson"}
+
+
+# Parsed sections and text view of a config kept between its conversions (see
+# watch.py), so that a changed config is only parsed and rendered again where
+# it differs. The cross-reference context is rebuilt, which is cheap.
+class ConversionState:
+    def __init__(self, options: ParserOptions | None = None) -> None:
+        self.sections: SectionCache = SectionCache(options)
+        self.text_cache: renderer.TextCache = renderer.TextCache()
+
+
+# converts SBC config file to HTML next to it, returns the output path; with
+# shared_assets, CSS/JS/font are written once into the "assets" directory next
+# to the output instead of being inlined into every page; parser diagnostics
+# are added to the given collector (nothing is added if the cache is hit);
+# with lazy, the text view is materialised in the browser as it's scrolled to;
+# the state is reused by the following conversions of the same file
+def convert_file(
+    source_file: Path,
+    cache: ConversionCache | None = None,
+    shared_assets: bool = False,
+    options: ParserOptions | None = None,
+    diagnostics: Diagnostics | None = None,
+    lazy: bool = False,
+    state: ConversionState | None = None,
+) -> Path:
+    # the cache key is the hash of the file
+    _check_file(source_file)
+
+    dest_file: Path = source_file.parent / (source_file.stem + ".html")
+    assets_url: str | None = _write_assets(dest_file.parent, shared_assets)
+
+    # outputs rendered with different options are cached separately
+    variant: str | None = f"{assets_url or ''};lazy" if lazy else assets_url
+
+    options = options or get_default_options()
+    key: str | None = None
+    json_cfg: dict[str, Any] | None = None
+    if cache:
+        key = cache.get_key(source_file, options.get_id())
+
+        # the output has been rendered from the same source and is unchanged
+        html_hash: str | None = cache.get_html_hash(key, dest_file, variant)
+        if html_hash and html_hash == hash_text_file(dest_file):
+            return dest_file
+
+        # the state reuses the subtrees of the previous parse instead
+        if state is None:
+            json_cfg = cache.get_tree(key)
+
+    if json_cfg is None:
+        json_cfg = _parse_file(
+            source_file, options, diagnostics, state.sections if state else None
+        )
+        if cache and key:
+            cache.put_tree(key, json_cfg)
+
+    # if the content hasn't changed, the output is kept as is
+    new_hash: str | None = _render_html(
+        dest_file,
+        json_cfg,
+        assets_url,
+        lazy,
+        state.text_cache if state else None,
+        skip_unchanged=bool(cache),
+    )
+
+    if cache and key and new_hash:
+        cache.put_html_hash(key, dest_file, variant, new_hash)
+
+    return dest_file
+
+
+# converts one of the configs found in a session log (see split.find_configs())
+# to HTML next to the log, the output is named after the log and the number of
+# the config in it, e.g. "session.2.html"; returns the output path
+def convert_segment(
+    source_file: Path,
+    segment: ConfigSegment,
+    number: int,
+    shared_assets: bool = False,
+    options: ParserOptions | None = None,
+    diagnostics: Diagnostics | None = None,
+    lazy: bool = False,
+) -> Path:
+    dest_file: Path = source_file.parent / f"{source_file.stem}.{number}.html"
+    assets_url: str | None = _write_assets(dest_file.parent, shared_assets)
+
+    try:
+        json_cfg, _ = parse(
+            [segment.read(source_file)], options or get_default_options(), diagnostics
+        )
+    except Exception as e:
+        raise ConversionError(f"Unable to parse config file: {e}") from e
+
+    if not json_cfg:
+        raise ConversionError(f"Unable to parse config {number} of {source_file}")
+
+    _render_html(dest_file, json_cfg, assets_url, lazy)
+    return dest_file
+
+
+# parses SBC config file and writes the tree next to it as JSON or NDJSON (one
+# record per top-level element, see export.iter_records()), returns the
+# output path; the output is written element by element
+def export_file(
+    source_file: Path,
+    format: str,
+    options: ParserOptions | None = None,
+    diagnostics: Diagnostics | None = None,
+) -> Path:
+    if format not in EXPORT_FORMATS:
+        raise ConversionError(f"Unknown export format: {format}")
+
+    json_cfg: dict[str, Any] = _parse_file(
+        source_file, options or get_default_options(), diagnostics
+    )
+    dest_file: Path = source_file.parent / (source_file.stem + EXPORT_FORMATS[format])
+    write: Callable[[TextIO, dict[str, Any]], None] = (
+        export.write_json if format == "json" else export.write_ndjson
+    )
+    _write_atomically(dest_file, lambda out: write(out, json_cfg), format.upper())
+    return dest_file
+
+
+# Finds the values in SBC config file, see ConfigIndex.find(). With
+# save_index, the index is saved next to the file (e.g. "sbc.index") and
+# reused by the next queries as long as the file, the parser settings and
+# the tool version are the same, so they don't parse the config again.
+def query_file(
+    source_file: Path,
+    query: str,
+    options: ParserOptions | None = None,
+    diagnostics: Diagnostics | None = None,
+    save_index: bool = False,
+    limit: int | None = None,
+) -> list[Hit]:
+    options = options or get_default_options()
+    try:
+        stat: os.stat_result = source_file.stat()
+    except OSError as e:
+        raise ConversionError(
+            f"File doesn't exist or not readable: {source_file}"
+        ) from e
+
+    index_file: Path = source_file.parent / (source_file.stem + ".index")
+    header: list[Any] = [
+        env.VERSION,
+        options.get_id(),
+        stat.st_mtime_ns,
+        stat.st_size,
+    ]
+
+    index: ConfigIndex | None = _load_index(index_file, header)
+    if index is None:
+        index = ConfigIndex(_parse_file(source_file, options, diagnostics))
+        if save_index:
+            _save_index(index_file, header, index)
+
+    return index.find(query, limit)
+
+
+# compares two SBC config files and writes the HTML report of the changes
+# next to the new one, returns the report path; parser diagnostics of each
+# file are added to its own collector
+def diff_files(
+    old_file: Path,
+    new_file: Path,
+    options: ParserOptions | None = None,
+    old_diagnostics: Diagnostics | None = None,
+    new_diagnostics: Diagnostics | None = None,
+) -> Path:
+    options = options or get_default_options()
+    json_cfgs: list[dict[str, Any]] = [
+        _parse_file(old_file, options, old_diagnostics),
+        _parse_file(new_file, options, new_diagnostics),
+    ]
+
+    dest_file: Path = new_file.parent / (new_file.stem + ".diff.html")
+    _write_atomically(
+        dest_file,
+        lambda out: renderer.render_diff_to(
+            out, diff(json_cfgs[0], json_cfgs[1]), old_file.name, new_file.name
+        ),
+    )
+    return dest_file
+
+
+# Parses SBC config file, with sections only the sections that changed since
+# the previous parse are parsed again (see SectionCache). Raises
+# ConversionError if the file can't be read or has no config.
+def _parse_file(
+    source_file: Path,
+    options: ParserOptions,
+    diagnostics: Diagnostics | None = None,
+    sections: SectionCache | None = None,
+) -> dict[str, Any]:
+    _check_file(source_file)
+
+    try:
+        with open(source_file, "r") as f:
+            if sections:
+                json_cfg, _ = sections.parse([f.read()], diagnostics)
+            else:
+                json_cfg, _ = parse(f, options, diagnostics)
+    except Exception as e:
+        raise ConversionError(f"Unable to parse config file: {e}") from e
+
+    if not json_cfg:
+        raise ConversionError(f"Unable to parse config file: {source_file}")
+    return json_cfg
+
+
+def _check_file(source_file: Path) -> None:
+    if not source_file.is_file():
+        raise ConversionError(f"File doesn't exist or not readable: {source_file}")
+
+
+# renders the page of the config into dest_file, see _write_atomically()
+def _render_html(
+    dest_file: Path,
+    json_cfg: dict[str, Any],
+    assets_url: str | None,
+    lazy: bool,
+    text_cache: renderer.TextCache | None = None,
+    skip_unchanged: bool = False,
+) -> str | None:
+    return _write_atomically(
+        dest_file,
+        lambda out: renderer.render_to(
+            out, json_cfg, dest_file.name, assets_url, lazy, text_cache
+        ),
+        skip_unchanged=skip_unchanged,
+    )
+
+
+# Writes the output with util.write_atomically(), binary outputs are written
+# by write() as bytes. With skip_unchanged, the text is hashed while it's
+# written and the output isn't replaced if it has the same hash; the hash is
+# returned then.
+def _write_atomically(
+    dest_file: Path,
+    write: Callable[[Any], None],
+    file_type: str = "HTML",
+    skip_unchanged: bool = False,
+    binary: bool = False,
+) -> str | None:
+    new_hash: str | None = None
+
+    def write_file(f: IO[Any]) -> bool:
+        nonlocal new_hash
+        if not skip_unchanged:
+            write(f)
+            return True
+
+        out = _HashingWriter(f)
+        write(out)
+        new_hash = out.hexdigest()
+        return new_hash != hash_text_file(dest_file)
+
+    try:
+        u.write_atomically(dest_file, write_file, binary)
+    except Exception as e:
+        raise ConversionError(f"Unable to write {file_type} file: {e}") from e
+
+    return new_hash
+
+
+def _load_index(index_file: Path, header: list[Any]) -> ConfigIndex | None:
+    try:
+        with open(index_file, "rb") as f:
+            return ConfigIndex.load(f, header)
+    except Exception:
+        return None
+
+
+# the next query parses the file again if the index can't be written
+def _save_index(index_file: Path, header: list[Any], index: ConfigIndex) -> None:
+    try:
+        _write_atomically(
+            index_file, lambda out: index.save(out, header), "index", binary=True
+        )
+    except ConversionError:
+        pass
+
+
+# writes CSS/JS/font into the "assets" directory if they're shared, returns
+# the URL the page refers to them by (None if they're inlined)
+def _write_assets(dest_dir: Path, shared_assets: bool) -> str | None:
+    if not shared_assets:
+        return None
+
+    try:
+        renderer.write_assets(dest_dir)
+    except Exception as e:
+        raise ConversionError(f"Unable to write assets: {e}") from e
+    return renderer.ASSETS_URL
+
+
+# computes the hash of the text while writing it
+class _HashingWriter:
+    def __init__(self, out: TextIO) -> None:
+        self.out: TextIO = out
+        self._digest = hashlib.sha256()
+
+    def write(self, text: str) -> int:
+        self._digest.update(text.encode())
+        return self.out.write(text)
+
+    def writelines(self, lines: Iterable[str]) -> None:
+        for line in lines:
+            self.write(line)
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
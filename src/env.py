@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 import sys
 
@@ -16,10 +17,14 @@ CONFIG_DIR: Path = (
 
 CONFIG_PATH: Path = CONFIG_DIR / "cfg.ini"
 
+CACHE_DIR: Path = (
+    Path(os.environ.get("LOCALAPPDATA", Path.home() / "AppData/Local"))
+    if os.name == "nt"
+    else Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+) / "sbc-html-config"
 
-def get_config() -> dict[str, str]:
-    print(CONFIG_PATH)
 
+def get_config() -> dict[str, str]:
     if not CONFIG_PATH.is_file():
         # default config
         return {"top-level-items": ""}
@@ -1,77 +1,39 @@
 import sys
-import webbrowser
+from multiprocessing import freeze_support
 from pathlib import Path
-from tkinter import filedialog, messagebox
-from typing import Any
 
-import acme.renderer as renderer
-import customtkinter as ctk
+import cli
 import env
-from acme.parser import to_json
+from worker import ConversionWorker, JobEvent, JobStatus
 
-
-def _show_error(message: str, gui_mode: bool) -> None:
-    if gui_mode:
-        messagebox.showerror("Error", message)
-    else:
-        print(message)
-
-
-def _process_file(source_file: Path, open_file: ctk.StringVar | None = None):
-    gui_mode: bool = open_file is not None
-
-    try:
-        if not source_file.is_file():
-            _show_error(f"File doesn't exist or not readable: {source_file}", gui_mode)
-            return
-
-        json_cfg: dict[str, Any] = {}
-        with open(source_file, "r") as f:
-            json_cfg = to_json(f.read())
-
-        if not json_cfg:
-            print(f"Unable to parse config file: {source_file}")
-            return
-
-    except Exception as e:
-        messagebox.showerror("Error", f"Unable to parse config file: {e}")
-
-    dest_file: Path = source_file.parent / (source_file.stem + ".html")
-    html = renderer.render(json_cfg, dest_file.name)
-
-    # import json
-    # _write_file(source_file.parent / (source_file.stem + ".json"), json.dumps(json_cfg, indent=4))
-
-    try:
-        _write_file(dest_file, html)
-    except Exception as e:
-        messagebox.showerror("Error", f"Unable to write HTML file: {e}")
-
-    if open_file and open_file.get() == "on":
-        webbrowser.open(str(dest_file))
-
-
-def _write_file(file: Path, content: str) -> None:
-    with open(file, "w") as f:
-        f.write(content)
+# how often the UI thread picks up the worker events, in milliseconds
+_POLL_INTERVAL: int = 100
 
 
 class Window:
     def __init__(self):
+        # GUI modules are imported lazily, so that the CLI mode doesn't pay for them
+        import customtkinter as ctk
+
         ctk.set_appearance_mode("light")
         ctk.set_default_color_theme("blue")
 
         self.root = ctk.CTk()
         self.root.title(f"{env.PROJECT_NAME} v{env.VERSION}")
-        self.root.geometry("450x250")
+        self.root.geometry("500x420")
         self.root.resizable(False, False)
 
         self.last_directory: Path = Path.home()
+        self.worker = ConversionWorker()
+        # files submitted and finished (converted, failed or cancelled) since
+        # the queue was last empty
+        self.total: int = 0
+        self.finished: int = 0
 
         frame = ctk.CTkFrame(master=self.root, fg_color=self.root.cget("bg"))
-        frame.pack(expand=True)
+        frame.pack(expand=True, fill="both", padx=20, pady=20)
 
-        label = ctk.CTkLabel(master=frame, text="Select SBC config file:")
+        label = ctk.CTkLabel(master=frame, text="Select SBC config files:")
         label.pack(pady=(0, 10))
 
         button = ctk.CTkButton(master=frame, text="Browse", command=self._on_click)
@@ -85,19 +47,38 @@ class Window:
             onvalue="on",
             offvalue="off",
         )
-        checkbox.pack()
+        checkbox.pack(pady=(0, 10))
+
+        self.status = ctk.CTkLabel(master=frame, text="")
+        self.status.pack()
+
+        self.progress = ctk.CTkProgressBar(master=frame)
+        self.progress.set(0)
+        self.progress.pack(fill="x", pady=(0, 10))
+
+        self.cancel_button = ctk.CTkButton(
+            master=frame, text="Cancel", command=self._on_cancel, state="disabled"
+        )
+        self.cancel_button.pack(pady=(0, 10))
+
+        self.log = ctk.CTkTextbox(master=frame, state="disabled", wrap="none")
+        self.log.pack(expand=True, fill="both")
 
     def show(self):
+        self.root.after(_POLL_INTERVAL, self._poll)
         self.root.mainloop()
+        self.worker.cancel()
 
     def _on_click(self):
+        from tkinter import filedialog
+
         initial_dir: str = (
             str(self.last_directory)
             if self.last_directory
             else filedialog.askdirectory()
         )
 
-        file = filedialog.askopenfilename(
+        files = filedialog.askopenfilenames(
             initialdir=initial_dir,
             filetypes=[
                 ("Text files", "*.txt *.log"),
@@ -105,20 +86,82 @@ class Window:
             ],
         )
 
-        if file:
-            file_path: Path = Path(file)
-            self.last_directory = file_path.parent
-            _process_file(file_path, self.open_file)
+        if files:
+            file_paths: list[Path] = [Path(file) for file in files]
+            self.last_directory = file_paths[0].parent
+            self.total += len(file_paths)
+            self.cancel_button.configure(state="normal")
+            self._update_progress()
+            self.worker.submit(file_paths)
+
+    def _on_cancel(self):
+        self.worker.cancel()
+        self.cancel_button.configure(state="disabled")
+        self.status.configure(text="Cancelling...")
+
+    # runs on the UI thread, the worker never touches the widgets
+    def _poll(self):
+        for event in self.worker.get_events():
+            self._on_event(event)
+        self.root.after(_POLL_INTERVAL, self._poll)
+
+    def _on_event(self, event: JobEvent):
+        if event.status is JobStatus.QUEUED:
+            return
+        if event.status is JobStatus.STARTED:
+            self.status.configure(
+                text=f"Converting {event.file.name} ({self.finished + 1}"
+                f" of {self.total})"
+            )
+            return
+
+        self.finished += 1
+        if event.status is JobStatus.DONE:
+            details: str = f"{event.elapsed:.2f}s"
+            if event.diagnostics:
+                details += f", {event.diagnostics}"
+            self._write_log(
+                f"ok      {event.file.name} -> {event.dest_file} ({details})"
+            )
+
+            if event.dest_file and self.open_file.get() == "on":
+                import webbrowser
+
+                webbrowser.open(str(event.dest_file))
+        elif event.status is JobStatus.FAILED:
+            self._write_log(f"failed  {event.file.name}: {event.error}")
+        else:
+            self._write_log(f"{event.status.value} {event.file.name}")
+
+        self._update_progress()
+        if self.finished == self.total:
+            self.status.configure(text=f"{self.finished} file(s) processed")
+            self.cancel_button.configure(state="disabled")
+            self.total = 0
+            self.finished = 0
+
+    def _update_progress(self):
+        self.progress.set(self.finished / self.total if self.total else 1)
+
+    def _write_log(self, text: str):
+        self.log.configure(state="normal")
+        self.log.insert("end", text + "\n")
+        self.log.configure(state="disabled")
+        self.log.see("end")
 
 
 ###############################################################################
 
 if __name__ == "__main__":
+    freeze_support()
+
+    args = cli.create_arg_parser().parse_args()
+
     # gui mode
-    if len(sys.argv) == 1:
+    if not args.paths:
         win = Window()
         win.show()
 
-    # cli mode
-    if len(sys.argv) == 2:
-        _process_file(Path(sys.argv[1]))
+    # cli and batch mode
+    else:
+        sys.exit(cli.run(args))
@@ -0,0 +1,77 @@
+import mmap
+import re
+from pathlib import Path
+
+from acme.parser import ParserOptions, get_default_options
+
+# CLI prompt line, e.g. "SBC1# show running-config" or "SBC1(configure)#",
+# the end of the previous command output and the start of the next one
+_PROMPT_PATTERN: re.Pattern[bytes] = re.compile(rb"^[^\s#>]+[#>](?:[ \t].*)?$", re.M)
+
+# the first word of a line with zero offset
+_ITEM_PATTERN: re.Pattern[bytes] = re.compile(rb"^[^\s]+", re.M)
+
+
+# A config found in a terminal session log: the output of a command between
+# two prompts that has top-level config lines. Offsets are in bytes, the
+# range is made of whole lines.
+class ConfigSegment:
+    __slots__ = ("start", "end", "prompt")
+
+    def __init__(self, start: int, end: int, prompt: str) -> None:
+        self.start: int = start
+        self.end: int = end
+        # the prompt line the config follows, empty if it's at the file start
+        self.prompt: str = prompt
+
+    # reads the segment text, it's parsed like a separate file
+    def read(self, source_file: Path) -> str:
+        with open(source_file, "rb") as f:
+            f.seek(self.start)
+            return f.read(self.end - self.start).decode()
+
+
+# Splits a session log with any number of "show running-config" (or similar)
+# outputs into separate configs. The file is memory-mapped and only scanned
+# with regular expressions for the prompt lines, so it isn't read into memory
+# nor split into lines. The command outputs without top-level items (e.g.
+# "show version") are skipped, a file without prompts is a single config.
+def find_configs(
+    source_file: Path, options: ParserOptions | None = None
+) -> list[ConfigSegment]:
+    top_level_items: set[bytes] = {
+        item.encode() for item in (options or get_default_options()).top_level_items
+    }
+    segments: list[ConfigSegment] = []
+
+    with open(source_file, "rb") as f:
+        # an empty file can't be mapped
+        if not f.seek(0, 2):
+            return []
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            start: int = 0
+            prompt: str = ""
+
+            for match in [*_PROMPT_PATTERN.finditer(data), None]:
+                end: int = match.start() if match else len(data)
+                if _has_config(data, start, end, top_level_items):
+                    segments.append(ConfigSegment(start, end, prompt))
+
+                if match:
+                    start = min(match.end() + 1, len(data))
+                    prompt = match.group().decode(errors="replace").strip()
+
+    return segments
+
+
+###############################################################################
+
+
+def _has_config(
+    data: mmap.mmap, start: int, end: int, top_level_items: set[bytes]
+) -> bool:
+    for match in _ITEM_PATTERN.finditer(data, start, end):
+        if match.group() in top_level_items:
+            return True
+    return False
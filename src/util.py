@@ -1,4 +1,6 @@
-from typing import Any
+import os
+from pathlib import Path
+from typing import IO, Any, Callable
 
 
 def is_dict(val):
@@ -46,3 +48,24 @@ def contains_not_empty(d: dict[str, Any], key: str) -> bool:
         return val != ""
 
     return True
+
+
+# Writes the file through a temporary file next to it, which is then moved in
+# place, so that neither a failed write nor a concurrent reader (e.g. another
+# worker process) ever sees a partial file. If write() returns False, the
+# temporary file is discarded and the file is left as is.
+def write_atomically(
+    path: Path, write: Callable[[IO[Any]], Any], binary: bool = False
+) -> None:
+    tmp_path: Path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb" if binary else "w") as f:
+            keep: Any = write(f)
+
+        if keep is False:
+            tmp_path.unlink()
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
@@ -0,0 +1,145 @@
+import os
+import time
+from pathlib import Path
+
+import acme.renderer as renderer
+from acme.parser import ParserOptions, get_default_options
+from batch import collect_files
+from cache import ConversionCache
+from convert import ConversionState, convert_file
+
+DEFAULT_INTERVAL: float = 1.0
+
+# file modification time and size
+FileState = tuple[int, int]
+
+
+# Polls the files (directories and glob patterns are expanded on every poll,
+# so new files are picked up) and converts those that have changed. A change
+# is only reported once the file has stayed the same for a whole interval, so
+# the files that are still being written aren't converted.
+class Watcher:
+    def __init__(
+        self,
+        paths: list[str],
+        cache: ConversionCache | None = None,
+        shared_assets: bool = False,
+        options: ParserOptions | None = None,
+        lazy: bool = False,
+    ) -> None:
+        self.paths: list[str] = paths
+        self.cache: ConversionCache | None = cache
+        self.shared_assets: bool = shared_assets
+        self.options: ParserOptions = options or get_default_options()
+        self.lazy: bool = lazy
+        # the state of the source when it was last converted
+        self._converted: dict[Path, FileState] = {}
+        # the state of the changed source seen on the previous poll
+        self._pending: dict[Path, FileState] = {}
+        self._is_first_poll: bool = True
+        # parsed sections and text view of each file, see ConversionState
+        self._states: dict[Path, ConversionState] = {}
+
+    # returns the files that have changed and are ready to be converted; the
+    # files whose HTML is missing or older than the source count as changed
+    def poll(self) -> list[Path]:
+        changed: list[Path] = []
+        files: list[Path] = collect_files(self.paths)
+
+        for file in files:
+            state: FileState | None = _get_state(file)
+            if state is None:
+                continue
+
+            if self._is_first_poll and _is_up_to_date(file, state):
+                self._converted[file] = state
+
+            if self._converted.get(file) == state:
+                self._pending.pop(file, None)
+            elif self._pending.get(file) == state:
+                del self._pending[file]
+                self._converted[file] = state
+                changed.append(file)
+            else:
+                self._pending[file] = state
+
+        # forget the removed files, so they're converted if they reappear
+        existing: set[Path] = set(files)
+        for file in [file for file in self._converted if file not in existing]:
+            del self._converted[file]
+            self._states.pop(file, None)
+
+        self._is_first_poll = False
+        return changed
+
+    # converts the changed files, returns the number of failed conversions
+    def update(self) -> int:
+        failed: int = 0
+
+        for file in self.poll():
+            start: float = time.perf_counter()
+            diagnostics = self.options.create_diagnostics()
+            try:
+                dest_file: Path = convert_file(
+                    file,
+                    self.cache,
+                    self.shared_assets,
+                    self.options,
+                    diagnostics,
+                    self.lazy,
+                    self._states.setdefault(file, ConversionState(self.options)),
+                )
+            # any error (e.g. of reading the file) only fails the file, so
+            # that the watcher keeps running
+            except Exception as e:
+                print(f"failed  {file}: {e}")
+                failed += 1
+                continue
+
+            details: str = f"{time.perf_counter() - start:.2f}s"
+            if diagnostics:
+                details += f", {diagnostics}"
+            print(f"updated {file} -> {dest_file} ({details})")
+
+        return failed
+
+
+# Converts the changed files until interrupted. The process stays alive, so
+# the parser options, templates and static assets are loaded once, and only
+# the changed sections of a changed file are parsed and rendered again.
+def watch(
+    paths: list[str],
+    interval: float = DEFAULT_INTERVAL,
+    cache: ConversionCache | None = None,
+    shared_assets: bool = False,
+    options: ParserOptions | None = None,
+    lazy: bool = False,
+) -> None:
+    renderer.warm_up()
+    watcher = Watcher(paths, cache, shared_assets, options, lazy)
+    print(f"Watching {' '.join(paths)}, press Ctrl+C to stop")
+
+    try:
+        while True:
+            watcher.update()
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+
+
+###############################################################################
+
+
+def _get_state(file: Path) -> FileState | None:
+    try:
+        stat: os.stat_result = file.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _is_up_to_date(source_file: Path, state: FileState) -> bool:
+    dest_state: FileState | None = _get_state(
+        source_file.parent / (source_file.stem + ".html")
+    )
+    return dest_state is not None and dest_state[0] >= state[0]
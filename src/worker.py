@@ -0,0 +1,126 @@
+import queue
+import threading
+import time
+from enum import Enum
+from pathlib import Path
+
+import acme.renderer as renderer
+from acme.parser import ParserOptions, get_default_options
+from cache import ConversionCache
+from convert import ConversionError, convert_file
+
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    STARTED = "converting"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+# a change of the job status, DONE events have the output path, FAILED ones
+# the error message
+class JobEvent:
+    __slots__ = ("file", "status", "dest_file", "error", "diagnostics", "elapsed")
+
+    def __init__(
+        self,
+        file: Path,
+        status: JobStatus,
+        dest_file: Path | None = None,
+        error: str | None = None,
+        diagnostics: str = "",
+        elapsed: float = 0,
+    ) -> None:
+        self.file: Path = file
+        self.status: JobStatus = status
+        self.dest_file: Path | None = dest_file
+        self.error: str | None = error
+        # summary of parser diagnostics
+        self.diagnostics: str = diagnostics
+        self.elapsed: float = elapsed
+
+
+# Converts files on a background thread one by one, so that the GUI stays
+# responsive. Files are queued by submit() and every status change is put
+# into the events queue, which the UI thread polls (Tk widgets can only be
+# used from the thread that created them). Cancelling drops the queued
+# files, the file being converted is finished as parsing can't be stopped
+# halfway.
+class ConversionWorker:
+    def __init__(
+        self,
+        cache: ConversionCache | None = None,
+        shared_assets: bool = False,
+        options: ParserOptions | None = None,
+    ) -> None:
+        self.cache: ConversionCache | None = cache
+        self.shared_assets: bool = shared_assets
+        self.options: ParserOptions = options or get_default_options()
+        self.events: queue.Queue[JobEvent] = queue.Queue()
+        # (file, generation), None stops the thread
+        self._jobs: queue.Queue[tuple[Path, int] | None] = queue.Queue()
+        # incremented on cancel, the jobs of the previous generations are dropped
+        self._generation: int = 0
+        self._thread: threading.Thread | None = None
+
+    def submit(self, files: list[Path]) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+        for file in files:
+            self.events.put(JobEvent(file, JobStatus.QUEUED))
+            self._jobs.put((file, self._generation))
+
+    def cancel(self) -> None:
+        self._generation += 1
+
+    # stops the thread once the queued jobs are processed (or dropped)
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._jobs.put(None)
+            self._thread.join()
+            self._thread = None
+
+    # returns the events posted since the previous call
+    def get_events(self) -> list[JobEvent]:
+        events: list[JobEvent] = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def _run(self) -> None:
+        renderer.warm_up()
+
+        while (job := self._jobs.get()) is not None:
+            file, generation = job
+            if generation != self._generation:
+                self.events.put(JobEvent(file, JobStatus.CANCELLED))
+                continue
+
+            self.events.put(JobEvent(file, JobStatus.STARTED))
+            self.events.put(self._convert(file))
+
+    def _convert(self, file: Path) -> JobEvent:
+        start: float = time.perf_counter()
+        diagnostics = self.options.create_diagnostics()
+
+        try:
+            dest_file: Path = convert_file(
+                file, self.cache, self.shared_assets, self.options, diagnostics
+            )
+        except ConversionError as e:
+            return JobEvent(file, JobStatus.FAILED, error=str(e))
+        except Exception as e:
+            return JobEvent(file, JobStatus.FAILED, error=f"Unexpected error: {e!r}")
+
+        return JobEvent(
+            file,
+            JobStatus.DONE,
+            dest_file,
+            diagnostics=str(diagnostics),
+            elapsed=time.perf_counter() - start,
+        )
@@ -1,9 +1,361 @@
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
 from pathlib import Path
 
-import main
+import acme.renderer as renderer
+import batch
+import cli
+import pytest
+import split
+import watch
+from acme.parser import SectionCache, to_json
+from benchmarks.generator import generate_text
+from cache import ConversionCache
+from convert import convert_file
+from watch import Watcher
+from worker import ConversionWorker, JobEvent, JobStatus
 
 PROTECTED = Path(__file__).parent.absolute().parent / "protected"
+SRC = Path(__file__).parent.absolute().parent / "src"
+CLI_IMPORT_BUDGET: float = 0.5
 
 
+@pytest.mark.skipif(not (PROTECTED / "example.log").is_file(), reason="no example.log")
 def test():
-    main._process_file(PROTECTED / "example.log")
+    assert convert_file(PROTECTED / "example.log").is_file()
+
+
+def test_generated(tmp_path, write_config):
+    source_file: Path = write_config("example.log")
+    assert convert_file(source_file) == tmp_path / "example.html"
+
+    html: str = (tmp_path / "example.html").read_text()
+    assert 'id="sip-manipulation_1"' in html
+    assert 'id="local-policy_19"' in html
+
+
+def test_batch(tmp_path, write_config):
+    for idx in range(3):
+        write_config(f"sbc{idx}.log")
+    (tmp_path / "garbage.txt").write_text("SBC1# show running-config\n")
+
+    files: list[Path] = batch.collect_files([str(tmp_path)])
+    results: list[batch.BatchResult] = batch.run_batch(files, workers=2)
+
+    assert len(results) == 4
+    assert [r.source_file.name for r in results if not r.is_ok()] == ["garbage.txt"]
+    assert (tmp_path / "sbc2.html").is_file()
+
+
+def test_split(tmp_path, write_config):
+    log: Path = write_config("session.log")
+    second: str = generate_text(10000).replace("SBC1#", "SBC2#")
+    with open(log, "a") as f:
+        f.write(f"SBC1# show version\nSCZ9.3.0\n{second}")
+
+    segments: list[split.ConfigSegment] = split.find_configs(log)
+    assert [s.prompt for s in segments] == [
+        "SBC1# show running-config",
+        "SBC2# show running-config",
+    ]
+    assert to_json(segments[1].read(log)) == to_json(second)
+
+    results: list[batch.BatchResult] = batch.run_split([log], workers=2)
+    assert sorted(r.config for r in results if r.is_ok()) == [1, 2]
+    assert (tmp_path / "session.2.html").read_text() == renderer.render(
+        to_json(second), "session.2.html"
+    )
+
+    (tmp_path / "empty.log").write_text("")
+    assert cli.main(["--split", str(tmp_path / "empty.log")]) == 1
+
+
+def test_cache(tmp_path, source_file):
+    cache = ConversionCache(tmp_path / "cache", max_size=1024 * 1024)
+
+    dest_file: Path = convert_file(source_file, cache)
+    mtime: int = dest_file.stat().st_mtime_ns
+    assert len(list((tmp_path / "cache").glob("*/*.tree"))) == 1
+
+    # unchanged source, the output isn't touched
+    assert convert_file(source_file, cache) == dest_file
+    assert dest_file.stat().st_mtime_ns == mtime
+
+    # another source, the cache is trimmed to fit max size
+    cache.max_size = 1
+    source_file.write_text(generate_text(10000))
+    convert_file(source_file, cache)
+    assert dest_file.stat().st_mtime_ns != mtime
+    assert len(list((tmp_path / "cache").glob("*/*"))) == 0
+
+
+def test_shared_assets(tmp_path, source_file):
+    html: str = convert_file(source_file, shared_assets=True).read_text()
+
+    assert (tmp_path / "assets/FiraMono.ttf").is_file()
+    assert '<script src="assets/main.js"></script>' in html
+    assert "base64," not in html.split("</head>")[0].split("<title>")[1]
+
+
+def test_render_to(tmp_path, source_file):
+    json_cfg = to_json(generate_text(1000))
+    out = io.StringIO()
+    renderer.render_to(out, json_cfg, "sbc.html")
+    assert out.getvalue() == renderer.render(json_cfg, "sbc.html")
+
+    convert_file(source_file)
+    assert sorted(f.name for f in tmp_path.iterdir()) == ["sbc.html", "sbc.log"]
+
+
+def test_lazy_render(monkeypatch):
+    monkeypatch.setattr(renderer, "LAZY_CHUNK_SIZE", 10)
+    json_cfg = to_json(generate_text(1000))
+    html: str = renderer.render(json_cfg, "sbc.html")
+    lazy_html: str = renderer.render(json_cfg, "sbc.html", lazy=True)
+
+    # materialising every placeholder gives the same page
+    placeholders = re.findall(r'<span class="lazy[ "][^>]*><template>', lazy_html)
+    assert len(placeholders) == lazy_html.count("</template></span>")
+    assert 'data-section="local-policy" data-from="10" data-to="19"' in lazy_html
+    assert (
+        re.sub(
+            r'<span class="lazy[ "][^>]*><template>|</template></span>', "", lazy_html
+        )
+        == html
+    )
+
+    # the placeholders have the realm class tokens of their elements
+    assert '<span class="lazy realm-0 realm-1" data-section="realm-config"' in lazy_html
+
+
+def test_text_cache():
+    src: str = generate_text(1000)
+    changes: list[str] = [
+        src.replace("sa1.example.com", "sa.example.com"),
+        # anchors of the realms and so the links to them change
+        src.replace(
+            "realm-config", "realm-config\n    identifier new\nrealm-config", 1
+        ),
+        src,
+    ]
+
+    sections = SectionCache()
+    text_cache = renderer.TextCache()
+    for text in [src, *changes]:
+        json_cfg, _ = sections.parse([text])
+        html: str = renderer.render(json_cfg, "sbc.html", text_cache=text_cache)
+        assert html == renderer.render(to_json(text), "sbc.html")
+
+
+def test_compiled_templates(tmp_path, monkeypatch):
+    json_cfg = to_json(generate_text(1000))
+    html: str = renderer.render(json_cfg, "sbc.html")
+
+    renderer.compile_templates(tmp_path)
+    monkeypatch.setattr(renderer, "COMPILED_DIR", tmp_path)
+    env = renderer._create_env()
+    env.filters.update(renderer.ENV.filters)
+    monkeypatch.setattr(renderer, "ENV", env)
+
+    assert renderer.render(json_cfg, "sbc.html") == html
+
+
+def test_cli(tmp_path, source_file):
+    assert cli.main([str(source_file)]) == 0
+    assert (tmp_path / "sbc.html").is_file()
+    assert cli.main([str(tmp_path / "missing.log")]) == 1
+
+
+def test_watch(tmp_path, write_config, monkeypatch, capsys):
+    up_to_date: Path = write_config("a.log")
+    convert_file(up_to_date)
+    stale: Path = write_config("b.log")
+
+    # a change is converted once the file stays the same for an interval
+    watcher = Watcher([str(tmp_path)])
+    assert watcher.poll() == []
+    assert watcher.poll() == [stale]
+    assert watcher.poll() == []
+
+    html_size: int = (tmp_path / "a.html").stat().st_size
+    up_to_date.write_text(generate_text(10000))
+    os.utime(up_to_date, ns=(0, time.time_ns() + 10**9))
+    assert watcher.poll() == []
+    assert watcher.update() == 0
+    assert (tmp_path / "a.html").stat().st_size > html_size
+    assert watcher.poll() == []
+
+    # an unexpected error fails the file, the others are still converted
+    def convert(file: Path, *args) -> Path:
+        if file == stale:
+            raise OSError("disk full")
+        return convert_file(file, *args)
+
+    monkeypatch.setattr(watch, "convert_file", convert)
+    html_size = (tmp_path / "a.html").stat().st_size
+    for file in (up_to_date, stale):
+        file.write_text(generate_text(100))
+        os.utime(file, ns=(0, time.time_ns() + 2 * 10**9))
+    assert watcher.poll() == []
+    assert watcher.update() == 1
+    assert f"failed  {stale}: disk full" in capsys.readouterr().out
+    assert (tmp_path / "a.html").stat().st_size != html_size
+
+
+def test_worker(tmp_path, write_config):
+    files: list[Path] = [write_config(f"sbc{idx}.log") for idx in range(3)]
+
+    worker = ConversionWorker()
+    worker.submit([files[0], tmp_path / "missing.log"])
+    worker.stop()
+    events: list[JobEvent] = worker.get_events()
+    assert [
+        (e.file.name, e.status) for e in events if e.status is not JobStatus.QUEUED
+    ] == [
+        ("sbc0.log", JobStatus.STARTED),
+        ("sbc0.log", JobStatus.DONE),
+        ("missing.log", JobStatus.STARTED),
+        ("missing.log", JobStatus.FAILED),
+    ]
+    assert events[3].dest_file == tmp_path / "sbc0.html"
+    assert "missing.log" in (events[-1].error or "")
+
+    # the file being converted is finished, the queued ones are dropped
+    release = threading.Event()
+    convert = worker._convert
+    worker._convert = lambda file: release.wait() and convert(file)  # type: ignore
+    worker.submit(files)
+    while worker.events.get().status is not JobStatus.STARTED:
+        pass
+    worker.cancel()
+    release.set()
+    worker.stop()
+    assert [(e.file.name, e.status) for e in worker.get_events()] == [
+        ("sbc0.log", JobStatus.DONE),
+        ("sbc1.log", JobStatus.CANCELLED),
+        ("sbc2.log", JobStatus.CANCELLED),
+    ]
+
+
+def test_cli_imports():
+    code: str = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import cli\n"
+        "elapsed = time.perf_counter() - start\n"
+        "gui = {'tkinter', 'customtkinter', 'webbrowser'} & set(sys.modules)\n"
+        "print(elapsed, sorted(gui))\n"
+    )
+    output: str = subprocess.run(
+        [sys.executable, "-c", code], cwd=SRC, capture_output=True, text=True
+    ).stdout
+
+    elapsed, gui = output.split(" ", 1)
+    assert float(elapsed) < CLI_IMPORT_BUDGET
+    assert gui.strip() == "[]"
+
+
+def test_page_meta():
+    json_cfg = to_json(generate_text(1000))
+    meta = renderer._PageMeta(json_cfg, renderer.Context(json_cfg))
+    html: str = renderer.render(json_cfg, "sbc.html")
+
+    # the same metadata is used by the sidebar and the text view
+    for element in meta.elements["local-policy"]:
+        assert element.realm_class
+        assert f'<code class="{element.realm_class}">' in html
+        assert f'<li class="{element.realm_class}">' in html
+        assert f'<a href="#{element.anchor}">{element.label}</a>' in html
+        assert f'<div id="{element.anchor}" class="scroll-marker">' in html
+
+    realm_links = meta.links["realm-id"]
+    assert realm_links == meta.links["source-realm"]
+    assert set(realm_links.values()) == {
+        element.anchor for element in meta.elements["realm-config"]
+    }
+
+
+def test_realm_filter():
+    json_cfg = {
+        "realm-config": {"identifier": "core"},
+        "sip-interface": [{"realm-id": "core"}, {"realm-id": "unknown"}, {}],
+        "session-agent": [{"realm-id": "core"}],
+    }
+    meta = renderer._PageMeta(json_cfg, renderer.Context(json_cfg))
+    html: str = renderer.render(json_cfg, "sbc.html")
+
+    # a single realm isn't a list
+    assert meta.realms == {"core": "realm-0"}
+    assert '<option value="realm-0">core</option>' in html
+
+    assert [e.realm_class for e in meta.elements["sip-interface"]] == [
+        "realm-0",
+        "",
+        "",
+    ]
+    assert meta.section_realms["sip-interface"] == "realm-0"
+    assert meta.realm_counts["sip-interface"] == {"realm-0": 1}
+    assert '<span class="count realm-count realm-0">[1]</span>' in html
+
+
+def test_search_index():
+    json_cfg = {
+        "realm-config": {"identifier": "core", "description": "core </script>"},
+        "sip-interface": [{"realm-id": "core"}, {"realm-id": "access"}],
+        "ntp-config": ["10.0.0.1", "10.0.0.2"],
+        "version": "core",
+    }
+    html: str = renderer.render(json_cfg, "sbc.html")
+
+    match = re.search(r'id="searchIndex">(.*?)</script>', html)
+    assert match
+    index = json.loads(match.group(1))
+
+    # only the elements with an anchor in the text view are indexed
+    assert index["anchors"] == ["realm-config", "sip-interface_0", "sip-interface_1"]
+    assert index["realms"] == ["realm-0", "realm-0", ""]
+    assert index["tokens"] == sorted(index["tokens"])
+    assert index["elements"][index["tokens"].index("core")] == [0, 1]
+    assert index["elements"][index["tokens"].index("</script>")] == [0]
+    for anchor in index["anchors"]:
+        assert f'id="{anchor}"' in html
+
+
+def test_text_config():
+    json_cfg = {
+        "realm-config": [{}, {"identifier": "r1", "network-interfaces": ["M0", "M1"]}],
+        "media-manager": {"state": "enabled", "options": None, "a": {"b": "1"}},
+    }
+
+    def line(key: str, value: str = "", depth: int = 1) -> str:
+        indent: str = " " * renderer.TAB_SIZE * depth
+        if not value:
+            return indent + key + "\n"
+        return indent + key.ljust(renderer.KEY_PAD_SIZE) + value + "\n"
+
+    assert renderer._to_text_config(json_cfg, renderer.Context(json_cfg)) == (
+        "<code>"
+        '<div id="realm-config_0" class="scroll-marker"></div><b>realm-config</b>\n'
+        "\n"
+        "</code>"
+        '<code class="realm-0">'
+        '<div id="realm-config_1" class="scroll-marker"></div><b>realm-config</b>\n'
+        + line("identifier", "r1")
+        + line("network-interfaces", "M0")
+        + " " * (renderer.TAB_SIZE + renderer.KEY_PAD_SIZE)
+        + "M1\n"
+        + "</code>"
+        "<code>"
+        '<div id="media-manager" class="scroll-marker"></div><b>media-manager</b>\n'
+        + line("state", "enabled")
+        + line("options")
+        + line("a")
+        + line("b", "1", 2)
+        + "</code>"
+    )
@@ -0,0 +1,23 @@
+from pathlib import Path
+from typing import Callable
+
+import pytest
+from benchmarks.generator import generate_text
+
+
+# writes a generated config of the given size into the test directory,
+# returns its path
+@pytest.fixture
+def write_config(tmp_path: Path) -> Callable[..., Path]:
+    def write(name: str = "sbc.log", size: int = 1000) -> Path:
+        file: Path = tmp_path / name
+        file.write_text(generate_text(size))
+        return file
+
+    return write
+
+
+# generated config in the test directory, "sbc.log"
+@pytest.fixture
+def source_file(write_config: Callable[..., Path]) -> Path:
+    return write_config()
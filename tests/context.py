@@ -0,0 +1,92 @@
+from acme.context import ConfigElement, Context
+
+CONFIG = {
+    "realm-config": [
+        {
+            "identifier": "core",
+            "network-interfaces": ["M00:0", "M01:0"],
+            "in-manipulationid": "manip",
+            "codec-policy": "cp",
+        },
+        {"identifier": "access", "constraint-name": "limits"},
+    ],
+    "sip-interface": [
+        {"realm-id": "core", "response-map": "rm", "out-manipulationid": "manip"},
+        {"realm-id": "access", "constraint-name": "limits"},
+    ],
+    "session-agent": [
+        {"hostname": "sa1", "realm-id": "access", "response-map": "rm"},
+        {"hostname": "sa2", "egress-realm-id": "core"},
+    ],
+    "session-group": {"group-name": "grp", "dest": ["sa1", "sa2"]},
+    "local-policy": {
+        "source-realm": ["core", "access"],
+        "policy-attribute": [
+            {"next-hop": "SAG:grp", "realm": "core"},
+            {"next-hop": "sa1", "realm": "access"},
+        ],
+    },
+    "network-interface": [
+        {"name": "M00", "sub-port-id": "0"},
+        {"name": "M01", "sub-port-id": "0"},
+    ],
+    "response-map": {"name": "rm"},
+    "sip-manipulation": {"name": "manip"},
+    "realm-group": {
+        "name": "rg",
+        "source-realms": "core",
+        "destination-realms": ["access", "core"],
+    },
+}
+
+
+def test_references():
+    ctx = Context(CONFIG)
+
+    refs = ctx.get_references(ConfigElement.LOCAL_POLICY, 0)
+    assert [(ref.attribute, ref.target, ref.target_id) for ref in refs] == [
+        ("source-realm", ConfigElement.REALM, "core"),
+        ("source-realm", ConfigElement.REALM, "access"),
+        ("realm", ConfigElement.REALM, "core"),
+        ("realm", ConfigElement.REALM, "access"),
+        ("next-hop", ConfigElement.SESSION_AGENT_GROUP, "grp"),
+        ("next-hop", ConfigElement.SESSION_AGENT, "sa1"),
+    ]
+
+    referrers = ctx.get_referrers(ConfigElement.SESSION_AGENT, "sa1")
+    assert [(ref.source, ref.source_idx) for ref in referrers] == [
+        (ConfigElement.SESSION_AGENT_GROUP, 0),
+        (ConfigElement.LOCAL_POLICY, 0),
+    ]
+    assert ctx.get_referrers(ConfigElement.REALM, "unknown") == []
+
+    refs = ctx.get_references(ConfigElement.REALM_GROUP, 0)
+    assert [(ref.attribute, ref.target_id) for ref in refs] == [
+        ("source-realms", "core"),
+        ("destination-realms", "access"),
+        ("destination-realms", "core"),
+    ]
+    referrers = ctx.get_referrers(ConfigElement.REALM, "access")
+    assert (ConfigElement.REALM_GROUP, 0) in [
+        (ref.source, ref.source_idx) for ref in referrers
+    ]
+
+
+def test_realms():
+    ctx = Context(CONFIG)
+
+    assert ctx.get_realms(ConfigElement.SIP_MANIPULATION, "manip") == ["core"]
+    assert ctx.get_realms(ConfigElement.NETWORK_INTERFACE, "M01:0") == ["core"]
+    assert ctx.get_realms(ConfigElement.SESSION_CONSTRAINTS, "limits") == ["access"]
+    # referenced by sip-interface and session-agent, not session-constraints
+    assert ctx.get_realms(ConfigElement.RESPONSE_MAP, "rm") == ["core", "access"]
+    assert ctx.get_realms(ConfigElement.SESSION_CONSTRAINTS, "rm") == []
+
+
+def test_element_pos():
+    ctx = Context(CONFIG)
+
+    assert ctx.get_element_pos(ConfigElement.REALM, "access") == (1, 2)
+    assert ctx.get_element_pos(ConfigElement.NETWORK_INTERFACE, "M01:0") == (1, 2)
+    assert ctx.get_element_pos(ConfigElement.RESPONSE_MAP, "rm") == (0, 1)
+    assert ctx.get_element_pos(ConfigElement.CODEC_POLICY, "cp") == (-1, -1)
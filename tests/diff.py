@@ -0,0 +1,120 @@
+import io
+from pathlib import Path
+
+import acme.renderer as renderer
+import cli
+from acme.context import ConfigElement, Context
+from acme.diff import ChangeType, diff
+from benchmarks.generator import generate_text
+
+OLD = {
+    "realm-config": [
+        {"identifier": "core", "mm-in-realm": "disabled"},
+        {"identifier": "access"},
+    ],
+    "session-agent": [
+        {"hostname": "sa1", "realm-id": "core"},
+        {"hostname": "sa1", "realm-id": "access"},
+    ],
+    "local-policy": {
+        "from-address": "*",
+        "to-address": "+1",
+        "policy-attribute": [{"next-hop": "sa1", "realm": "core"}],
+    },
+    "sip-config": {"state": "enabled"},
+}
+
+NEW = {
+    "realm-config": [
+        {"identifier": "edge"},
+        {"identifier": "access"},
+        {"identifier": "core", "mm-in-realm": "enabled", "options": None},
+    ],
+    "session-agent": [{"hostname": "sa1", "realm-id": "core"}],
+    "local-policy": {
+        "from-address": "*",
+        "to-address": "+1",
+        "policy-attribute": [{"next-hop": "sa2", "realm": "core"}],
+    },
+    "media-manager": {"state": "enabled"},
+}
+
+
+def test_diff():
+    changes = diff(OLD, NEW)
+
+    # elements are matched by identity, not by position
+    assert [(c.section, c.key, c.type) for c in changes] == [
+        ("realm-config", "core", ChangeType.CHANGED),
+        ("realm-config", "edge", ChangeType.ADDED),
+        ("session-agent", "sa1 (2)", ChangeType.REMOVED),
+        ("local-policy", "*:+1:", ChangeType.CHANGED),
+        ("sip-config", "sip-config", ChangeType.REMOVED),
+        ("media-manager", "media-manager", ChangeType.ADDED),
+    ]
+
+    # absent attributes are None, attributes without value are empty
+    assert [(f.path, f.old, f.new) for f in changes[0].fields] == [
+        ("mm-in-realm", "disabled", "enabled"),
+        ("options", None, ""),
+    ]
+    assert [(f.path, f.old, f.new) for f in changes[3].fields] == [
+        ("policy-attribute[0] > next-hop", "sa1", "sa2"),
+    ]
+    assert diff(OLD, OLD) == []
+
+
+def test_diff_report_names():
+    out = io.StringIO()
+    renderer.render_diff_to(out, diff(OLD, {}), "<old>.log", "a&b.log")
+    assert "<h2>&lt;old&gt;.log &rarr; a&amp;b.log</h2>" in out.getvalue()
+
+
+def test_element_keys():
+    # the diff, the cross-references and the sidebar identify elements alike
+    policy = {
+        "from-address": "*",
+        "to-address": "+1",
+        "source-realm": ["core", "access"],
+        "next-hop": "sa1",
+    }
+    changes = diff(
+        {"local-policy": [policy, {}]},
+        {"local-policy": [{**policy, "next-hop": "sa2"}, {}]},
+    )
+    assert [change.key for change in changes] == ["*:+1:core,access"]
+
+    ctx = Context({"local-policy": [policy, {}]})
+    key: str = changes[0].key
+    assert ctx.get_element_pos(ConfigElement.LOCAL_POLICY, key) == (0, 2)
+    assert (
+        renderer._get_tree_item_name(policy, "local-policy", 0)
+        == "0: *:+1:core,access to sa1"
+    )
+
+
+def test_diff_report(tmp_path, capsys):
+    old_file: Path = tmp_path / "old.log"
+    new_file: Path = tmp_path / "new.log"
+    old_file.write_text(generate_text(1000) + "old-only\n")
+    new_file.write_text(
+        generate_text(1000).replace("sa0.example.com", "sa.example.com")
+    )
+
+    assert cli.main(["--diff", str(old_file), str(new_file)]) == 0
+    html: str = (tmp_path / "new.diff.html").read_text()
+    assert "<b>removed: sa0.example.com</b>" in html
+    assert "<b>added: sa.example.com</b>" in html
+    # diagnostics are reported per file
+    output: str = capsys.readouterr().out
+    old_output, new_output = output.split(f"\n{new_file}: ")
+    assert f"\n{old_file}: " in old_output
+    assert "ignored line: 'old-only'" in old_output
+    assert "old-only" not in new_output
+
+    assert cli.main(["--diff", str(old_file)]) == 2
+
+    garbage_file: Path = tmp_path / "garbage.log"
+    garbage_file.write_text("SBC1# show running-config\n")
+    assert cli.main(["--diff", str(garbage_file), str(new_file)]) == 1
+    assert f"Unable to parse config file: {garbage_file}" in capsys.readouterr().out
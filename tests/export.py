@@ -0,0 +1,47 @@
+import io
+import json
+
+import cli
+from acme.export import write_json, write_ndjson
+from acme.parser import to_json
+from benchmarks.generator import generate_text
+
+CONFIG = {
+    "realm-config": [{"identifier": "core", "options": ["a", "b"]}, {}],
+    "sip-config": {"state": "enabled", "options": None},
+    "steering-pool": [],
+    "empty": None,
+}
+
+
+def test_write_json():
+    for json_cfg in (CONFIG, {}, to_json(generate_text(1000))):
+        out = io.StringIO()
+        write_json(out, json_cfg)
+        assert out.getvalue() == json.dumps(json_cfg, indent=4)
+
+
+def test_write_ndjson():
+    out = io.StringIO()
+    write_ndjson(out, CONFIG)
+    assert [json.loads(line) for line in out.getvalue().splitlines()] == [
+        {"section": "realm-config", "index": 0, "value": CONFIG["realm-config"][0]},
+        {"section": "realm-config", "index": 1, "value": {}},
+        {"section": "sip-config", "index": 0, "value": CONFIG["sip-config"]},
+        {"section": "empty", "index": 0, "value": None},
+    ]
+
+
+def test_export_cli(tmp_path, source_file):
+    assert cli.main(["--format", "json", str(source_file)]) == 0
+    json_cfg = json.loads((tmp_path / "sbc.json").read_text())
+    assert json_cfg == to_json(source_file.read_text())
+
+    assert cli.main(["--format", "ndjson", str(tmp_path), "-w", "1"]) == 0
+    records = [
+        json.loads(line) for line in (tmp_path / "sbc.ndjson").read_text().splitlines()
+    ]
+    assert len(records) == sum(
+        len(value) if isinstance(value, list) else 1 for value in json_cfg.values()
+    )
+    assert not (tmp_path / "sbc.html").exists()
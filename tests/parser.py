@@ -0,0 +1,147 @@
+import io
+
+from acme.parser import (
+    DiagnosticType,
+    ParserOptions,
+    SectionCache,
+    get_default_options,
+    parse,
+    parse_stream,
+    to_json,
+)
+
+CONFIG = """
+SBC1# show running-config
+realm-config
+        identifier                              core
+        network-interfaces
+                                                M00:0
+                                                M01:0
+        in-manipulationid                       manip
+realm-config
+        identifier                              access
+sip-manipulation
+        name                                    manip
+        header-rule
+                name                            hr1
+                element-rule
+                        name                    er1
+                        new-value               $ORIGINAL
+task done
+"""
+
+
+def test_to_json():
+    json_cfg = to_json(CONFIG)
+
+    assert list(json_cfg.keys()) == ["realm-config", "sip-manipulation"]
+    assert json_cfg["realm-config"][0] == {
+        "identifier": "core",
+        "network-interfaces": ["M00:0", "M01:0"],
+        "in-manipulationid": "manip",
+    }
+    assert json_cfg["realm-config"][1] == {"identifier": "access"}
+    assert json_cfg["sip-manipulation"]["header-rule"]["element-rule"] == {
+        "name": "er1",
+        "new-value": "$ORIGINAL",
+    }
+
+
+def test_parse_stream():
+    assert parse_stream(io.StringIO(CONFIG)) == to_json(CONFIG)
+    assert parse_stream(CONFIG.splitlines(keepends=True)) == to_json(CONFIG)
+
+
+def test_to_json_tabs_and_dedent():
+    src = (
+        "local-policy\n"
+        "\tfrom-address\n" + "\t" * 12 + "1.1.1.1\n" + "\t" * 12 + "2.2.2.2\n"
+        "\tpolicy-attribute\n"
+        "\t\tnext-hop\t\t\t\tSAG:core\n"
+        "\t\taction\n"
+        "\tpolicy-attribute\n"
+        "\t\tnext-hop\t\t\t\tsa1\n"
+        "local-policy\n"
+        "\tto-address   *\n"
+    )
+
+    assert to_json(src) == {
+        "local-policy": [
+            {
+                "from-address": ["1.1.1.1", "2.2.2.2"],
+                "policy-attribute": [
+                    {"next-hop": "SAG:core", "action": None},
+                    {"next-hop": "sa1"},
+                ],
+            },
+            {"to-address": "*"},
+        ]
+    }
+
+
+def test_parser_options(capsys):
+    src: str = "custom-item\n        name  c1\nrealm-config\n        identifier  r1\n"
+
+    tree = parse_stream(io.StringIO(src), ParserOptions(["custom-item"], False))
+    assert tree == {"custom-item": {"name": "c1"}, "realm-config": {"identifier": "r1"}}
+    assert capsys.readouterr().out == ""
+
+    # extra items don't leak into other parses
+    assert "custom-item" not in get_default_options().top_level_items
+    assert "custom-item" not in to_json(src)
+
+
+def test_intern():
+    tree = parse_stream(io.StringIO(CONFIG), ParserOptions(intern=True))
+    assert tree == to_json(CONFIG)
+
+    def get_key(value: dict, key: str) -> str:
+        return next(k for k in value if k == key)
+
+    # equal keys and values of different lines are the same object
+    manip = tree["sip-manipulation"]
+    assert manip["name"] is tree["realm-config"][0]["in-manipulationid"]
+    assert get_key(manip, "name") is get_key(manip["header-rule"], "name")
+
+    plain = to_json(CONFIG)["sip-manipulation"]
+    assert get_key(plain, "name") is not get_key(plain["header-rule"], "name")
+
+
+def test_diagnostics(capsys):
+    noise: str = "".join(f"SBC1# show {idx}\n" for idx in range(100))
+    tree, diagnostics = parse(io.StringIO(noise + CONFIG), ParserOptions(max_samples=3))
+
+    assert tree == to_json(CONFIG)
+    assert diagnostics.get_count(DiagnosticType.IGNORED_LINE) == 100 + len(
+        parse(io.StringIO(CONFIG))[1].samples[DiagnosticType.IGNORED_LINE]
+    )
+    assert diagnostics.get_count(DiagnosticType.ERROR) == 0
+    assert diagnostics.samples[DiagnosticType.IGNORED_LINE] == [
+        (1, "'SBC1# show 0'"),
+        (2, "'SBC1# show 1'"),
+        (3, "'SBC1# show 2'"),
+    ]
+    assert str(diagnostics).endswith(" ignored lines")
+    assert capsys.readouterr().out == ""
+
+    parse(io.StringIO(noise), ParserOptions(verbose=True))
+    assert capsys.readouterr().out.count("ignored line") == 100
+
+
+def test_section_cache():
+    cache = SectionCache()
+    tree, diagnostics = cache.parse(io.StringIO(CONFIG))
+    assert tree == to_json(CONFIG)
+    assert diagnostics.samples == parse(io.StringIO(CONFIG))[1].samples
+
+    # unchanged sections are reused
+    changed: str = CONFIG.replace("access", "edge")
+    new_tree, _ = cache.parse(io.StringIO(changed))
+    assert new_tree == to_json(changed)
+    assert new_tree["realm-config"][0] is tree["realm-config"][0]
+    assert new_tree["realm-config"][1] is not tree["realm-config"][1]
+    assert new_tree["sip-manipulation"] is tree["sip-manipulation"]
+
+    # a top-level item with a value can't be merged, the config is parsed as a whole
+    changed = CONFIG.replace("sip-manipulation", "realm-config value\n        x")
+    assert cache.parse(io.StringIO(changed))[0] == to_json(changed)
@@ -0,0 +1,88 @@
+import io
+
+import cli
+import convert
+import util as u
+from acme.query import ConfigIndex, index_values
+from benchmarks.generator import generate_text
+
+CONFIG = {
+    "realm-config": [
+        {"identifier": "core", "in-manipulationid": "manip"},
+        {"identifier": "access", "network-interfaces": ["M00:0", "M01:0"]},
+    ],
+    "sip-manipulation": {
+        "name": "manip",
+        "header-rule": [{"name": "hr1"}, {"name": "hr2", "new-value": "a manip"}],
+    },
+    "session-agent": {"hostname": "10.1.2.3", "options": None},
+}
+
+
+def test_config_index():
+    index = ConfigIndex(CONFIG)
+
+    # values are found as a whole and by words
+    assert [str(hit) for hit in index.find("manip")] == [
+        "realm-config[0] (core) > in-manipulationid: manip",
+        "sip-manipulation[0] (manip) > name: manip",
+        "sip-manipulation[0] (manip) > header-rule[1] > new-value: manip",
+    ]
+    assert [str(hit) for hit in index.find("M0*")] == [
+        "realm-config[1] (access) > network-interfaces: M00:0",
+        "realm-config[1] (access) > network-interfaces: M01:0",
+    ]
+    assert [hit.path for hit in index.find("hr*", limit=1)] == ["header-rule[0] > name"]
+    assert index.find("10.1.2") == []
+    assert index.find("10.1.2*")[0].key == "10.1.2.3"
+    assert index.find("zzz*") == []
+    assert len(index.find("*")) == len(index.postings)
+
+
+def test_save_index():
+    out = io.BytesIO()
+    ConfigIndex(CONFIG).save(out, ["v1"])
+
+    out.seek(0)
+    index = ConfigIndex.load(out, ["v1"])
+    assert index
+    assert [str(hit) for hit in index.find("M0*")] == [
+        str(hit) for hit in ConfigIndex(CONFIG).find("M0*")
+    ]
+
+    # an index saved with another header is ignored
+    out.seek(0)
+    assert ConfigIndex.load(out, ["v2"]) is None
+
+
+def test_index_values():
+    values: list = [item for value in CONFIG.values() for item in u.ensure_list(value)]
+    tokens, positions = index_values(values)
+
+    assert tokens == ConfigIndex(CONFIG).tokens
+    assert positions[tokens.index("manip")] == [0, 2]
+    assert positions[tokens.index("a manip")] == [2]
+    assert positions[tokens.index("M01:0")] == [1]
+
+
+def test_query_cli(tmp_path, source_file, monkeypatch, capsys):
+    assert cli.main(["--query", "sa1.example.com", str(source_file)]) == 0
+    output: str = capsys.readouterr().out
+    assert "session-agent[1] (sa1.example.com) > hostname: sa1.example.com" in output
+    assert not (tmp_path / "sbc.index").exists()
+
+    args: list[str] = ["--query", "sa1.example.com", "--save-index", str(source_file)]
+    assert cli.main(args) == 0
+    assert capsys.readouterr().out == output
+    assert (tmp_path / "sbc.index").is_file()
+
+    # the saved index is used until the config changes
+    def parse(*args):
+        raise AssertionError("parsed again")
+
+    monkeypatch.setattr(convert, "parse", parse)
+    assert cli.main(["--query", "sa1.example.com", str(source_file)]) == 0
+    assert capsys.readouterr().out == output
+
+    source_file.write_text(generate_text(1000) + "\n")
+    assert cli.main(["--query", "sa1.example.com", str(source_file)]) == 1